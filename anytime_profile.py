@@ -0,0 +1,62 @@
+import bisect
+
+import numpy as np
+
+
+def best_cost_at(trace, elapsed):
+    """Melhor custo conhecido após `elapsed` segundos (inf se a execução ainda não tinha custo)"""
+    idx = bisect.bisect_right(trace['times'], elapsed) - 1
+    if idx < 0:
+        return float('inf')
+    return trace['best_costs'][idx]
+
+
+def quality_curves(traces, time_grid):
+    """Matriz (execuções x tempos) com o melhor custo de cada execução em cada instante da grade"""
+    return np.array([[best_cost_at(trace, t) for t in time_grid] for trace in traces])
+
+
+def time_to_target(trace, target):
+    """Primeiro instante em que o melhor custo atinge o alvo (inf se nunca atingiu)"""
+    for elapsed, cost in zip(trace['times'], trace['best_costs']):
+        if cost <= target:
+            return elapsed
+    return float('inf')
+
+
+def time_to_target_samples(traces, target):
+    """Tempo até o alvo de cada execução"""
+    return [time_to_target(trace, target) for trace in traces]
+
+
+def empirical_cdf(samples):
+    """
+    CDF empírica do tempo de execução: P(T <= t).
+    Execuções que não atingiram o alvo (inf) contam no denominador, então a curva
+    termina na taxa de sucesso em vez de 1.
+    """
+    finite = np.sort([s for s in samples if np.isfinite(s)])
+    probabilities = np.arange(1, len(finite) + 1) / max(len(samples), 1)
+    return finite, probabilities
+
+
+def performance_profile(samples_by_schedule, taus):
+    """
+    Perfil de desempenho (Dolan-Moré): para cada schedule, a fração das execuções (seeds)
+    em que a métrica ficou a no máximo tau vezes a do melhor schedule naquela seed.
+    Todas as listas devem seguir a mesma ordem de seeds.
+    """
+    schedules = list(samples_by_schedule.keys())
+    values = np.array([samples_by_schedule[s] for s in schedules], dtype=np.float64)
+    best = values.min(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = values / np.maximum(best, 1e-12)
+    # Seed em que ninguém atingiu o alvo: não conta a favor de nenhum schedule
+    ratios[:, ~np.isfinite(best)] = np.inf
+
+    n_problems = values.shape[1]
+    return {
+        schedule: np.array([(ratios[i] <= tau).sum() / n_problems for tau in taus])
+        for i, schedule in enumerate(schedules)
+    }
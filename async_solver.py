@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+
+_FINISHED = object()
+
+
+async def stream_solve(sa, snapshot_interval=1000, record_history=False, executor=None):
+    """
+    Executa sa.solve_iter() em um executor e entrega os snapshots como um async generator.
+
+    Cancelar a task que consome o stream (ou parar de iterar) sinaliza o token de parada
+    da execução e espera a thread terminar; se a execução ainda estava na fila do executor,
+    ela para logo no início. O último snapshot tem done=True e 'result'.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    # Criado antes de submeter: o cancelamento vale mesmo que a thread ainda não tenha começado
+    stop_event = threading.Event()
+
+    def run():
+        try:
+            for snapshot in sa.solve_iter(snapshot_interval=snapshot_interval,
+                                          record_history=record_history, stop_event=stop_event):
+                loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+        except BaseException as exc:
+            loop.call_soon_threadsafe(queue.put_nowait, exc)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _FINISHED)
+
+    future = loop.run_in_executor(executor, run)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _FINISHED:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop_event.set()
+        await asyncio.shield(future)
+
+
+async def solve_async(sa, on_snapshot=None, snapshot_interval=1000, record_history=True, executor=None):
+    """Equivalente assíncrono de solve(): chama on_snapshot(snapshot) a cada snapshot e retorna o resultado"""
+    result = None
+    async for snapshot in stream_solve(sa, snapshot_interval, record_history, executor):
+        if on_snapshot is not None:
+            on_snapshot(snapshot)
+        if snapshot['done']:
+            result = snapshot['result']
+    return result
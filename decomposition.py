@@ -0,0 +1,285 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulated_annealing import SimulatedAnnealing
+from distance_storage import build_distance_matrix, nint
+from lower_bound import gap_to_bound
+
+
+# Regiões menores que isto não passam pelo SA (os operadores precisam de algumas cidades)
+MIN_REGION_SIZE = 5
+
+
+def _subproblem_params(params):
+    """Limite inferior e gap alvo se referem à instância inteira, não valem para sub-problemas"""
+    return {key: value for key, value in params.items() if key not in ('lower_bound', 'target_gap')}
+
+
+def _solve_region(cities, params, seed):
+    """Resolve o sub-tour de uma região; retorna a rota em índices locais"""
+    if len(cities) < MIN_REGION_SIZE:
+        return list(range(len(cities)))
+    sa = SimulatedAnnealing(None, _subproblem_params(params), seed=seed, cities=cities)
+    return sa.solve(verbose=False, record_history=False)['best_route']
+
+
+def _refine_window(cities, params, seed, distance_dtype):
+    """
+    Reotimiza um trecho da rota global mantendo a primeira e a última cidade fixas.
+    A aresta entre as extremidades recebe custo muito negativo, então o SA tende a mantê-la
+    e o resto do ciclo é o caminho entre elas. Retorna a ordem local do caminho, ou a ordem
+    original se o resultado não mantiver as extremidades ou não encurtar o caminho.
+    """
+    m = len(cities)
+    identity = list(range(m))
+    distances = build_distance_matrix(cities, distance_dtype).astype(np.float64)
+    matrix = distances.copy()
+    big = matrix.sum() + 1.0
+    matrix[0, m - 1] = matrix[m - 1, 0] = -big
+
+    sa = SimulatedAnnealing(None, _subproblem_params(params), seed=seed, cities=cities, distance_matrix=matrix)
+    route = sa.solve(verbose=False, record_history=False)['best_route']
+    # A rota começa na cidade 0; a última cidade do caminho deve estar logo depois ou logo antes dela
+    if route[0] != 0:
+        return identity
+    if route[1] == m - 1:
+        route = [route[0]] + route[1:][::-1]
+    if route[-1] != m - 1:
+        return identity
+
+    def path_cost(order):
+        order = np.asarray(order)
+        return float(distances[order[:-1], order[1:]].sum())
+
+    if path_cost(route) > path_cost(identity):
+        return identity
+    return route
+
+
+class DecompositionSolver:
+    """
+    Particiona e costura para instâncias grandes:
+    1. agrupa as cidades em regiões de ~region_size cidades (k-means ou grade);
+    2. resolve o sub-tour de cada região com SimulatedAnnealing em processos paralelos;
+    3. ordena as regiões por um tour dos centróides e costura os sub-tours;
+    4. refina janelas ao redor de cada costura (overlap * region_size cidades de cada lado).
+
+    Nunca constrói a matriz n x n global; os custos globais são calculados pelas coordenadas.
+    Por isso target_gap exige lower_bound nos params; com o gap atingido já na costura,
+    o refinamento é pulado.
+    """
+
+    def __init__(self, instance_file, params, seed=42, region_size=200, overlap=0.1,
+                 method='kmeans', n_workers=None, refine_params=None):
+        self.instance_file = instance_file
+        self.params = params
+        self.seed = seed
+        self.region_size = region_size
+        self.overlap = overlap
+        self.method = method
+        self.n_workers = n_workers
+        self.refine_params = refine_params if refine_params is not None else params
+        self.distance_dtype = params.get('distance_dtype', 'float64')
+        self.lower_bound = params.get('lower_bound')
+        self.target_gap = params.get('target_gap')
+        if self.target_gap is not None and self.lower_bound is None:
+            # O limite da instância (instance_lower_bound) precisaria da matriz n x n global
+            raise ValueError("target_gap no DecompositionSolver exige 'lower_bound' nos parâmetros")
+
+        self.cities = SimulatedAnnealing._load_cities_from_file(instance_file)
+        self.coords = np.asarray(self.cities, dtype=np.float64)
+        self.n_cities = len(self.cities)
+
+    def _tour_cost(self, route):
+        """Custo do ciclo calculado direto das coordenadas"""
+        points = self.coords[np.asarray(route)]
+        lengths = np.sqrt(((points - np.roll(points, -1, axis=0)) ** 2).sum(axis=1))
+        if self.distance_dtype == 'nint':
+            lengths = nint(lengths)
+        return float(lengths.sum())
+
+    def _cluster_kmeans(self, k, rng, iterations=25):
+        """Lloyd simples em NumPy; retorna o rótulo de cada cidade"""
+        centroids = self.coords[rng.choice(self.n_cities, size=k, replace=False)]
+        labels = None
+        squared_norms = (self.coords ** 2).sum(axis=1)[:, np.newaxis]
+        for _ in range(iterations):
+            # |x - c|² = |x|² - 2 x.c + |c|², sem criar o array n x k x 2
+            distances = squared_norms - 2 * self.coords @ centroids.T + (centroids ** 2).sum(axis=1)
+            new_labels = distances.argmin(axis=1)
+            if labels is not None and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            for c in range(k):
+                members = self.coords[labels == c]
+                if len(members) > 0:
+                    centroids[c] = members.mean(axis=0)
+        return labels
+
+    def _cluster_grid(self, k):
+        """Divide o retângulo envolvente em uma grade de ~k células"""
+        side = max(1, int(math.ceil(math.sqrt(k))))
+        mins = self.coords.min(axis=0)
+        spans = np.maximum(self.coords.max(axis=0) - mins, 1e-12)
+        cells = np.minimum(((self.coords - mins) / spans * side).astype(np.int64), side - 1)
+        return cells[:, 0] * side + cells[:, 1]
+
+    def _build_regions(self, rng):
+        k = max(1, int(math.ceil(self.n_cities / self.region_size)))
+        if self.method == 'kmeans':
+            labels = self._cluster_kmeans(k, rng)
+        elif self.method == 'grid':
+            labels = self._cluster_grid(k)
+        else:
+            raise ValueError(f"Método de particionamento '{self.method}' não reconhecido")
+        # Descarta rótulos vazios
+        return [np.flatnonzero(labels == label).tolist() for label in np.unique(labels)]
+
+    def _order_regions(self, regions, executor):
+        """Ordem de visita das regiões: tour dos centróides resolvido pelo próprio SA"""
+        centroids = [tuple(self.coords[region].mean(axis=0)) for region in regions]
+        if len(centroids) < MIN_REGION_SIZE:
+            return list(range(len(regions))), np.asarray(centroids)
+        order = executor.submit(_solve_region, centroids, self.params, self.seed).result()
+        return order, np.asarray(centroids)
+
+    def _stitch(self, regions, region_routes, order, centroids):
+        """
+        Junta os sub-tours na ordem das regiões. Cada ciclo é aberto na cidade mais próxima
+        da saída da região anterior, no sentido cuja saída fica mais perto da próxima região.
+        Retorna a rota global e as posições das costuras.
+        """
+        tour = []
+        seams = []
+        for position, region_idx in enumerate(order):
+            cycle = [regions[region_idx][local] for local in region_routes[region_idx]]
+            points = self.coords[cycle]
+
+            entry = 0
+            if tour:
+                entry = int(((points - self.coords[tour[-1]]) ** 2).sum(axis=1).argmin())
+
+            if position + 1 < len(order):
+                target = centroids[order[position + 1]]
+            else:
+                target = self.coords[tour[0]] if tour else points[entry]
+
+            forward = cycle[entry:] + cycle[:entry]
+            backward = [forward[0]] + forward[1:][::-1]
+            forward_gap = ((self.coords[forward[-1]] - target) ** 2).sum()
+            backward_gap = ((self.coords[backward[-1]] - target) ** 2).sum()
+
+            seams.append(len(tour))
+            tour.extend(forward if forward_gap <= backward_gap else backward)
+        return tour, seams
+
+    def _refine(self, tour, seams, executor):
+        """Reotimiza em paralelo as janelas (que não se sobrepõem) ao redor de cada costura"""
+        n = len(tour)
+        bounds = seams + [n]
+        region_lengths = [bounds[i + 1] - bounds[i] for i in range(len(seams))]
+        half_window = max(2, int(self.overlap * self.region_size))
+
+        windows = []
+        for i, seam in enumerate(seams):
+            # No máximo metade de cada região vizinha, para as janelas não se cruzarem
+            previous_length = region_lengths[i - 1]
+            w = min(half_window, previous_length // 2, region_lengths[i] // 2)
+            if 2 * w < MIN_REGION_SIZE or 2 * w >= n:
+                continue
+            positions = [(seam - w + offset) % n for offset in range(2 * w)]
+            windows.append(positions)
+
+        futures = []
+        for window_idx, positions in enumerate(windows):
+            window_cities = [self.cities[tour[p]] for p in positions]
+            futures.append(executor.submit(_refine_window, window_cities, self.refine_params,
+                                           self.seed + window_idx, self.distance_dtype))
+
+        refined = list(tour)
+        for positions, future in zip(windows, futures):
+            local_order = future.result()
+            original = [tour[p] for p in positions]
+            for p, local in zip(positions, local_order):
+                refined[p] = original[local]
+        return refined
+
+    def solve(self, verbose=True):
+        start_time = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
+        regions = self._build_regions(rng)
+
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"Decomposição - {self.n_cities} cidades em {len(regions)} regiões ({self.method})")
+            print(f"{'='*60}")
+
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            futures = [executor.submit(_solve_region, [self.cities[c] for c in region],
+                                       self.params, self.seed + idx)
+                       for idx, region in enumerate(regions)]
+            region_routes = [future.result() for future in futures]
+
+            order, centroids = self._order_regions(regions, executor)
+            stitched, seams = self._stitch(regions, region_routes, order, centroids)
+            stitched_cost = self._tour_cost(stitched)
+            stitched_time = time.perf_counter() - start_time
+            if verbose:
+                print(f"Custo após costura: {stitched_cost:.2f}")
+
+            # Gap alvo já atingido pela costura: o refinamento não é necessário
+            stopped_early = (self.target_gap is not None and
+                             gap_to_bound(stitched_cost, self.lower_bound) <= self.target_gap)
+            if stopped_early:
+                refined = stitched
+                if verbose:
+                    print(f"Parada antecipada: gap alvo de {self.target_gap:.2f}% atingido na costura")
+            else:
+                refined = self._refine(stitched, seams, executor)
+            refined_cost = self._tour_cost(refined)
+            refined_time = time.perf_counter() - start_time
+            if verbose:
+                print(f"Custo após refinamento das fronteiras: {refined_cost:.2f}")
+                print(f"{'='*60}\n")
+
+        # Mesma convenção do SA: a rota começa na cidade 0
+        start = refined.index(0)
+        best_route = refined[start:] + refined[:start]
+        start = stitched.index(0)
+        initial_route = stitched[start:] + stitched[:start]
+
+        return {
+            'initial_route': initial_route,
+            'best_route': best_route,
+            'initial_cost': stitched_cost,
+            'best_cost': refined_cost,
+            # Histórico por etapa: 0 = sub-tours costurados, 1 = após o refinamento
+            'history': {
+                'iterations': [0, 1],
+                'temperatures': [0.0, 0.0],
+                'current_costs': [stitched_cost, refined_cost],
+                'best_costs': [stitched_cost, refined_cost],
+                'routes': [],
+                'reheat_points': [],
+                'restart_points': []
+            },
+            'cities': self.cities,
+            'seed': self.seed,
+            'stopped_early': stopped_early,
+            'elite_pool': [],
+            'lower_bound': self.lower_bound,
+            'gap_to_bound': (gap_to_bound(refined_cost, self.lower_bound)
+                             if self.lower_bound else None),
+            'reached_target_gap': (self.target_gap is not None and
+                                   gap_to_bound(refined_cost, self.lower_bound) <= self.target_gap),
+            # Não há uma execução única do SA para resumir (cada região tem a sua)
+            'acceptance_stats': None,
+            'anytime_trace': {
+                'times': [stitched_time, refined_time],
+                'best_costs': [stitched_cost, min(stitched_cost, refined_cost)]
+            },
+            'regions': regions
+        }
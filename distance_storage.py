@@ -0,0 +1,150 @@
+import numpy as np
+
+
+class PackedDistanceMatrix:
+    """
+    Matriz de distâncias simétrica guardada só com o triângulo superior (sem a diagonal),
+    em um vetor de n(n-1)/2 posições. Aceita indexação matrix[i, j] com inteiros ou arrays.
+    """
+
+    def __init__(self, data, n):
+        self.data = data
+        self.n = n
+        self.shape = (n, n)
+        self.dtype = data.dtype
+        # Deslocamento de cada linha: a posição de (i, j), i < j, é _row_offsets[i] + j
+        rows = np.arange(n, dtype=np.intp)
+        self._row_offsets = rows * n - (rows * (rows + 1)) // 2 - rows - 1
+        self._zero = self.dtype.type(0)
+
+    @classmethod
+    def from_dense(cls, matrix):
+        n = matrix.shape[0]
+        rows, cols = np.triu_indices(n, k=1)
+        return cls(np.ascontiguousarray(matrix[rows, cols]), n)
+
+    def __getitem__(self, key):
+        i, j = key
+        if np.isscalar(i) and np.isscalar(j):
+            if i == j:
+                return self._zero
+            if i > j:
+                i, j = j, i
+            return self.data[self._row_offsets[i] + j]
+
+        i = np.asarray(i)
+        j = np.asarray(j)
+        low = np.minimum(i, j)
+        high = i + j - low
+        # Na diagonal o índice calculado cai em [-1, n(n-1)/2 - 1] (sempre válido); o valor é zerado depois
+        values = self.data[self._row_offsets[low] + high]
+        return np.where(low == high, self._zero, values)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def max(self):
+        return self.data.max() if self.data.size > 0 else self.dtype.type(0)
+
+    def astype(self, dtype):
+        return PackedDistanceMatrix(self.data.astype(dtype), self.n)
+
+    def __truediv__(self, value):
+        return PackedDistanceMatrix(self.data / value, self.n)
+
+    def toarray(self):
+        """Reconstrói a matriz densa n x n"""
+        matrix = np.zeros((self.n, self.n), dtype=self.dtype)
+        rows, cols = np.triu_indices(self.n, k=1)
+        matrix[rows, cols] = self.data
+        matrix[cols, rows] = self.data
+        return matrix
+
+
+def nint(values):
+    """Arredondamento do TSPLIB para EUC_2D: nint(x) = int(x + 0.5)"""
+    return np.floor(values + 0.5)
+
+
+# Elementos calculados por bloco de linhas: limita os temporários float64 a ~8 MB cada
+BLOCK_ELEMENTS = 1 << 20
+
+
+def _block_distances(coords, start, stop, first_column=0):
+    """Distâncias euclidianas (float64) das linhas start..stop-1 para as colunas first_column..n-1"""
+    dx = coords[start:stop, 0][:, np.newaxis] - coords[first_column:, 0][np.newaxis, :]
+    dy = coords[start:stop, 1][:, np.newaxis] - coords[first_column:, 1][np.newaxis, :]
+    return np.sqrt(dx**2 + dy**2)
+
+
+def matrix_layout(cities, distance_dtype='float64', packed=False):
+    """(dtype, shape) do array que guarda a matriz: (n, n) densa ou (n(n-1)/2,) compactada"""
+    coords = np.asarray(cities, dtype=np.float64).reshape(-1, 2)
+    n = len(coords)
+
+    if distance_dtype == 'float64':
+        dtype = np.dtype(np.float64)
+    elif distance_dtype == 'float32':
+        dtype = np.dtype(np.float32)
+    elif distance_dtype == 'nint':
+        # A diagonal do retângulo envolvente limita a maior distância
+        spans = coords.max(axis=0) - coords.min(axis=0) if n > 0 else np.zeros(2)
+        diameter = nint(np.sqrt((spans ** 2).sum()))
+        dtype = np.dtype(np.int16 if diameter <= np.iinfo(np.int16).max else np.int32)
+    else:
+        raise ValueError(f"Tipo de distância '{distance_dtype}' não reconhecido")
+
+    return dtype, ((n * (n - 1) // 2,) if packed else (n, n))
+
+
+def build_distance_matrix(cities, distance_dtype='float64', packed=False, out=None):
+    """
+    Cria a matriz de distâncias euclidianas no formato pedido.
+
+    distance_dtype:
+      - 'float64': distâncias exatas (comportamento original);
+      - 'float32': metade da memória, precisão suficiente para comparar custos;
+      - 'nint': distâncias inteiras arredondadas como no TSPLIB (mesma métrica dos ótimos
+        conhecidos, ex.: eil51 = 426), em int16 quando couber e int32 caso contrário.
+    packed: guarda só o triângulo superior (aprox. metade da memória).
+
+    A matriz é calculada em blocos de linhas já convertidos para o tipo final (e, no formato
+    compactado, escritos direto no vetor do triângulo), então o pico de memória fica perto do
+    tamanho da matriz final mais um bloco. out recebe um array já alocado com o layout de
+    matrix_layout() (ex.: um bloco de memória compartilhada) para escrever nele diretamente.
+    """
+    coords = np.asarray(cities, dtype=np.float64).reshape(-1, 2)
+    n = len(coords)
+    dtype, shape = matrix_layout(coords, distance_dtype, packed)
+    if out is not None and (out.dtype != dtype or out.shape != shape):
+        raise ValueError(f"out deve ter dtype {dtype} e shape {shape}")
+
+    def convert(block):
+        if distance_dtype == 'nint':
+            block = nint(block)
+        return block.astype(dtype, copy=False)
+
+    block_rows = max(1, BLOCK_ELEMENTS // max(n, 1))
+
+    if not packed:
+        matrix = out if out is not None else np.empty(shape, dtype=dtype)
+        for start in range(0, n, block_rows):
+            stop = min(start + block_rows, n)
+            matrix[start:stop] = convert(_block_distances(coords, start, stop))
+        return matrix
+
+    data = out if out is not None else np.empty(shape, dtype=dtype)
+    position = 0
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        # Só as colunas à direita da diagonal; a linha i usa as colunas i+1..n-1
+        block = convert(_block_distances(coords, start, stop, first_column=start))
+        for i in range(start, stop):
+            length = n - i - 1
+            data[position:position + length] = block[i - start, i - start + 1:]
+            position += length
+    return PackedDistanceMatrix(data, n)
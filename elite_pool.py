@@ -0,0 +1,70 @@
+import bisect
+
+
+class ElitePool:
+    """
+    Guarda as k melhores rotas distintas encontradas, ordenadas por custo.
+    Rotas equivalentes (mesmo ciclo, em qualquer sentido ou cidade inicial) contam uma vez só.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = []  # Lista de (custo, rota, hash), em ordem crescente de custo
+        self._hashes = set()
+
+    @staticmethod
+    def tour_key(route):
+        """Forma canônica do ciclo: começa na cidade 0 e segue no sentido do menor vizinho"""
+        start = route.index(0)
+        rotated = route[start:] + route[:start]
+        if len(rotated) > 2 and rotated[-1] < rotated[1]:
+            rotated = [rotated[0]] + rotated[:0:-1]
+        return hash(tuple(rotated))
+
+    @property
+    def threshold(self):
+        """Custo que uma rota precisa superar para entrar no pool"""
+        if len(self.entries) < self.size:
+            return float('inf')
+        return self.entries[-1][0]
+
+    def add(self, route, cost):
+        """Tenta inserir a rota; retorna True se ela entrou no pool"""
+        if self.size <= 0 or cost >= self.threshold:
+            return False
+
+        key = self.tour_key(route)
+        if key in self._hashes:
+            return False
+
+        costs = [entry[0] for entry in self.entries]
+        self.entries.insert(bisect.bisect_right(costs, cost), (cost, list(route), key))
+        self._hashes.add(key)
+
+        if len(self.entries) > self.size:
+            _, _, removed_key = self.entries.pop()
+            self._hashes.discard(removed_key)
+        return True
+
+    def sample(self, rng):
+        """Escolhe uma rota do pool (cópia) e seu custo"""
+        cost, route, _ = rng.choice(self.entries)
+        return list(route), cost
+
+    def __len__(self):
+        return len(self.entries)
+
+    def to_list(self):
+        return [{'route': list(route), 'cost': cost} for cost, route, _ in self.entries]
+
+
+def double_bridge(route, rng):
+    """
+    Perturbação double-bridge: corta a rota em A|B|C|D e reconecta como A|C|B|D.
+    A primeira cidade continua fixa, como nos operadores de vizinhança do SA.
+    """
+    n = len(route)
+    if n < 8:
+        return list(route)
+    p1, p2, p3 = sorted(rng.sample(range(1, n), 3))
+    return route[:p1] + route[p2:p3] + route[p1:p2] + route[p3:]
@@ -2,6 +2,9 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 
+from anytime_profile import (quality_curves, time_to_target_samples,
+                             empirical_cdf, performance_profile)
+
 class GraphGenerator:
     def __init__(self, output_dir='graficos'):
         self.output_dir = output_dir
@@ -328,10 +331,12 @@ class GraphGenerator:
         plt.savefig(os.path.join(self.output_dir, filename), dpi=300, bbox_inches='tight')
         plt.close()
     
-    def plot_boxplot_comparison(self, multiple_runs_data, filename):
+    def plot_boxplot_comparison(self, multiple_runs_data, filename, reference=None, 
+                                reference_label='Referência'):
         """
         Plota boxplot minimalista comparando os resultados de múltiplas execuções
         para diferentes cooling schedules com paleta de cores bonita.
+        reference (ótimo conhecido ou limite inferior) é desenhado como linha horizontal.
         """
         fig, ax = plt.subplots(figsize=(14, 8))
         
@@ -370,15 +375,17 @@ class GraphGenerator:
             patch.set_alpha(0.85)
             patch.set_edgecolor('none') 
         
-        ax.axhline(y=426, color='#27AE60', linestyle='--', linewidth=2.5, 
-                  label='Ótimo Conhecido (426)', alpha=0.7, zorder=0)
+        if reference is not None:
+            ax.axhline(y=reference, color='#27AE60', linestyle='--', linewidth=2.5, 
+                      label=f'{reference_label} ({reference:.2f})', alpha=0.7, zorder=0)
         
         ax.set_ylabel('Custo Final', fontsize=13, fontweight='bold')
         ax.set_xlabel('Cooling Schedule', fontsize=13, fontweight='bold')
         ax.set_title('Comparação de Desempenho: 10 Execuções por Schedule', 
                     fontsize=15, fontweight='bold', pad=20)
         ax.grid(True, alpha=0.2, axis='y', linestyle='--', linewidth=0.8)
-        ax.legend(fontsize=12, loc='upper right', framealpha=0.95)
+        if reference is not None:
+            ax.legend(fontsize=12, loc='upper right', framealpha=0.95)
 
         ax.spines['top'].set_visible(False)
         ax.spines['right'].set_visible(False)
@@ -394,6 +401,94 @@ class GraphGenerator:
         plt.close()
         print(f"  ✓ Boxplot salvo: {filename}")
     
+    def plot_quality_vs_time(self, traces_by_schedule, filename, reference=None):
+        """Plota o melhor custo em função do tempo (mediana e faixa Q1-Q3 entre as seeds)."""
+        fig, ax = plt.subplots(figsize=(14, 7))
+        
+        all_times = [t for traces in traces_by_schedule.values() 
+                     for trace in traces for t in trace['times'] if t > 0]
+        time_grid = np.logspace(np.log10(min(all_times)), np.log10(max(all_times)), 300)
+        
+        for schedule_name, traces in traces_by_schedule.items():
+            costs = quality_curves(traces, time_grid)
+            color = self.colors.get(schedule_name, '#000000')
+            # Antes de todas as execuções terem custo, o percentil fica infinito
+            with np.errstate(invalid='ignore'):
+                median = np.percentile(costs, 50, axis=0)
+                q1 = np.percentile(costs, 25, axis=0)
+                q3 = np.percentile(costs, 75, axis=0)
+            
+            ax.plot(time_grid, median, linewidth=2.5, color=color,
+                   label=schedule_name.replace('_', ' ').title())
+            ax.fill_between(time_grid, q1, q3, color=color, alpha=0.15)
+        
+        if reference is not None:
+            ax.axhline(y=reference, color='#27AE60', linestyle='--', linewidth=2,
+                      label=f'Referência ({reference:.2f})', alpha=0.7)
+        
+        ax.set_xscale('log')
+        ax.set_xlabel('Tempo (s)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Melhor Custo', fontsize=12, fontweight='bold')
+        ax.set_title('Qualidade vs. Tempo - Mediana e Q1-Q3 entre as Seeds', 
+                    fontsize=14, fontweight='bold', pad=20)
+        ax.legend(fontsize=11, loc='best')
+        ax.grid(True, alpha=0.3)
+        
+        plt.tight_layout()
+        plt.savefig(os.path.join(self.output_dir, filename), dpi=300, bbox_inches='tight')
+        plt.close()
+    
+    def plot_time_to_target_cdf(self, traces_by_schedule, target, filename):
+        """Plota a CDF empírica do tempo até atingir o custo alvo para cada schedule."""
+        fig, ax = plt.subplots(figsize=(14, 7))
+        
+        for schedule_name, traces in traces_by_schedule.items():
+            times, probabilities = empirical_cdf(time_to_target_samples(traces, target))
+            if len(times) > 0:
+                ax.step(times, probabilities, where='post', linewidth=2.5,
+                       color=self.colors.get(schedule_name, '#000000'),
+                       label=schedule_name.replace('_', ' ').title())
+        
+        ax.set_xscale('log')
+        ax.set_ylim(0, 1.05)
+        ax.set_xlabel('Tempo até o Alvo (s)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('P(atingir o alvo)', fontsize=12, fontweight='bold')
+        ax.set_title(f'Distribuição do Tempo até o Alvo (custo <= {target:.2f})', 
+                    fontsize=14, fontweight='bold', pad=20)
+        ax.legend(fontsize=11, loc='best')
+        ax.grid(True, alpha=0.3)
+        
+        plt.tight_layout()
+        plt.savefig(os.path.join(self.output_dir, filename), dpi=300, bbox_inches='tight')
+        plt.close()
+    
+    def plot_performance_profile(self, traces_by_schedule, target, filename, max_tau=10.0):
+        """Plota o perfil de desempenho (Dolan-Moré) usando o tempo até o alvo de cada seed."""
+        fig, ax = plt.subplots(figsize=(14, 7))
+        
+        samples = {schedule_name: time_to_target_samples(traces, target) 
+                   for schedule_name, traces in traces_by_schedule.items()}
+        taus = np.logspace(0, np.log10(max_tau), 200)
+        profiles = performance_profile(samples, taus)
+        
+        for schedule_name, profile in profiles.items():
+            ax.step(taus, profile, where='post', linewidth=2.5,
+                   color=self.colors.get(schedule_name, '#000000'),
+                   label=schedule_name.replace('_', ' ').title())
+        
+        ax.set_xscale('log')
+        ax.set_ylim(0, 1.05)
+        ax.set_xlabel('τ (tempo / melhor tempo da seed)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Fração das Seeds', fontsize=12, fontweight='bold')
+        ax.set_title(f'Perfil de Desempenho - Tempo até o Alvo (custo <= {target:.2f})', 
+                    fontsize=14, fontweight='bold', pad=20)
+        ax.legend(fontsize=11, loc='best')
+        ax.grid(True, alpha=0.3)
+        
+        plt.tight_layout()
+        plt.savefig(os.path.join(self.output_dir, filename), dpi=300, bbox_inches='tight')
+        plt.close()
+    
     def generate_all_graphs(self, result, schedule_name):
         """Gera todos os gráficos para um resultado específico."""
         cities = result['cities']
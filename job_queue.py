@@ -0,0 +1,346 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+
+from simulated_annealing import SimulatedAnnealing
+
+
+class JobQueue:
+    """
+    Fila de execuções do SA persistida em SQLite.
+
+    Cada linha da tabela `jobs` é uma combinação (instância, schedule, seed, params).
+    Vários processos (ou máquinas apontando para o mesmo arquivo) podem pegar jobs
+    de forma atômica; jobs cujo lease expirou (worker morreu) voltam para a fila.
+    """
+
+    def __init__(self, db_path, lease_timeout=3600.0, max_attempts=3):
+        self.db_path = db_path
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self._create_tables()
+
+    def _connect(self):
+        """Abre uma conexão em modo autocommit (transações controladas manualmente)"""
+        conn = sqlite3.connect(self.db_path, timeout=60.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _create_tables(self):
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    instance_file TEXT NOT NULL,
+                    cooling_schedule TEXT NOT NULL,
+                    seed INTEGER NOT NULL,
+                    run_idx INTEGER NOT NULL,
+                    params TEXT NOT NULL,
+                    keep_history INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker_id TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_expires REAL,
+                    best_cost REAL,
+                    result BLOB,
+                    error TEXT,
+                    finished_at REAL,
+                    UNIQUE (instance_file, cooling_schedule, seed, params)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            # Jobs de cada sweep: o mesmo banco pode acumular sweeps com parâmetros diferentes
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sweep_jobs (
+                    sweep_key TEXT NOT NULL,
+                    job_id INTEGER NOT NULL REFERENCES jobs (id),
+                    run_idx INTEGER NOT NULL,
+                    PRIMARY KEY (sweep_key, job_id)
+                )
+            """)
+
+    def enqueue_sweep(self, instance_file, cooling_schedules, seeds, params_base):
+        """
+        Insere a grade (schedule x seed) na fila. Jobs já existentes são ignorados,
+        então rodar o mesmo sweep duas vezes não duplica trabalho.
+        Retorna (sweep_key, número de jobs novos); sweep_key filtra os resultados deste
+        sweep em load_results() e load_anytime_traces().
+        """
+        sweep_key = hashlib.sha256(json.dumps({
+            'instance_file': instance_file,
+            'cooling_schedules': list(cooling_schedules),
+            'seeds': list(seeds),
+            'params': params_base
+        }, sort_keys=True).encode('utf-8')).hexdigest()
+
+        rows = []
+        for schedule in cooling_schedules:
+            params = params_base.copy()
+            params['cooling_schedule'] = schedule
+            params_json = json.dumps(params, sort_keys=True)
+            for run_idx, seed in enumerate(seeds):
+                # Só a primeira execução de cada schedule guarda o histórico (usado nos gráficos)
+                rows.append((instance_file, schedule, seed, run_idx, params_json, int(run_idx == 0)))
+
+        with closing(self._connect()) as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO jobs
+                    (instance_file, cooling_schedule, seed, run_idx, params, keep_history)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            new_jobs = conn.total_changes - before
+            conn.executemany("""
+                INSERT OR IGNORE INTO sweep_jobs (sweep_key, job_id, run_idx)
+                SELECT ?, id, ? FROM jobs
+                WHERE instance_file = ? AND cooling_schedule = ? AND seed = ? AND params = ?
+            """, [(sweep_key, run_idx, instance_file, schedule, seed, params_json)
+                  for instance_file, schedule, seed, run_idx, params_json, _ in rows])
+        return sweep_key, new_jobs
+
+    def claim_job(self, worker_id):
+        """
+        Pega atomicamente o próximo job pendente (ou com lease expirado).
+        Retorna um dict com os dados do job ou None se não houver nada a fazer.
+        """
+        conn = self._connect()
+        try:
+            now = time.time()
+            # BEGIN IMMEDIATE garante o lock de escrita antes do SELECT
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("""
+                SELECT * FROM jobs
+                WHERE attempts < ?
+                  AND (status = 'pending' OR (status = 'running' AND lease_expires < ?))
+                ORDER BY id
+                LIMIT 1
+            """, (self.max_attempts, now)).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute("""
+                UPDATE jobs
+                SET status = 'running', worker_id = ?, attempts = attempts + 1, lease_expires = ?
+                WHERE id = ?
+            """, (worker_id, now + self.lease_timeout, row['id']))
+            conn.execute("COMMIT")
+        except Exception:
+            # Se o próprio BEGIN falhou (timeout do lock) não há transação para desfazer
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        # A linha foi lida antes do UPDATE: reflete o estado do claim no dict retornado
+        job = dict(row, status='running', worker_id=worker_id, attempts=row['attempts'] + 1,
+                   lease_expires=now + self.lease_timeout)
+        job['params'] = json.loads(job['params'])
+        return job
+
+    def renew_lease(self, job_id, worker_id):
+        """
+        Estende o lease de um job em execução (heartbeat do worker).
+        Retorna False se o job não pertence mais a este worker (lease expirou e outro o pegou).
+        """
+        with closing(self._connect()) as conn:
+            cursor = conn.execute("""
+                UPDATE jobs
+                SET lease_expires = ?
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            """, (time.time() + self.lease_timeout, job_id, worker_id))
+            return cursor.rowcount > 0
+
+    def complete_job(self, job_id, worker_id, result, keep_history=True):
+        """
+        Grava o resultado de um job (JSON comprimido) e marca como concluído.
+        Só o worker dono do lease pode gravar; retorna False se o job foi pego por outro.
+        """
+        stored = {key: value for key, value in result.items() if key != 'history' or keep_history}
+        blob = zlib.compress(json.dumps(stored).encode('utf-8'))
+
+        with closing(self._connect()) as conn:
+            cursor = conn.execute("""
+                UPDATE jobs
+                SET status = 'done', best_cost = ?, result = ?, error = NULL,
+                    lease_expires = NULL, finished_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            """, (float(result['best_cost']), blob, time.time(), job_id, worker_id))
+            return cursor.rowcount > 0
+
+    def fail_job(self, job_id, worker_id, error):
+        """Registra a falha; o job volta para a fila até atingir max_attempts"""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute("""
+                UPDATE jobs
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    error = ?, lease_expires = NULL
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            """, (self.max_attempts, str(error), job_id, worker_id))
+            return cursor.rowcount > 0
+
+    def requeue_expired(self):
+        """Devolve para a fila os jobs de workers que morreram (lease expirado)"""
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                UPDATE jobs
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    lease_expires = NULL
+                WHERE status = 'running' AND lease_expires < ?
+            """, (self.max_attempts, time.time()))
+            return conn.execute("SELECT changes()").fetchone()[0]
+
+    def status_counts(self):
+        """Retorna a contagem de jobs por status"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def has_open_jobs(self):
+        """True enquanto existir job pendente ou em execução"""
+        counts = self.status_counts()
+        return counts.get('pending', 0) + counts.get('running', 0) > 0
+
+    def load_results(self, instance_file=None, sweep_key=None):
+        """
+        Lê os jobs concluídos no formato usado por main.py:
+        - results: resultado completo da primeira execução de cada schedule;
+        - multiple_runs_costs: custos finais de todas as execuções, por schedule.
+        Com sweep_key (retornado por enqueue_sweep) só entram os jobs daquele sweep.
+        """
+        rows = self._done_rows(instance_file, sweep_key)
+
+        results = {}
+        multiple_runs_costs = {}
+        for row in rows:
+            schedule = row['cooling_schedule']
+            multiple_runs_costs.setdefault(schedule, []).append(row['best_cost'])
+            if row['keep_history'] and schedule not in results:
+                results[schedule] = json.loads(zlib.decompress(row['result']).decode('utf-8'))
+
+        return results, multiple_runs_costs
+
+    def load_anytime_traces(self, instance_file=None, sweep_key=None):
+        """Curvas (tempo, melhor custo) de todas as execuções concluídas, por schedule"""
+        traces = {}
+        for row in self._done_rows(instance_file, sweep_key):
+            result = json.loads(zlib.decompress(row['result']).decode('utf-8'))
+            traces.setdefault(row['cooling_schedule'], []).append(result['anytime_trace'])
+        return traces
+
+    def _done_rows(self, instance_file=None, sweep_key=None):
+        """Jobs concluídos, ordenados por schedule e execução"""
+        if sweep_key is not None:
+            query = """
+                SELECT jobs.* FROM jobs JOIN sweep_jobs ON sweep_jobs.job_id = jobs.id
+                WHERE jobs.status = 'done' AND sweep_jobs.sweep_key = ?
+            """
+            args = (sweep_key,)
+            order = " ORDER BY jobs.cooling_schedule, sweep_jobs.run_idx"
+        else:
+            query = "SELECT * FROM jobs WHERE status = 'done'"
+            args = ()
+            order = " ORDER BY cooling_schedule, run_idx"
+        if instance_file is not None:
+            query += " AND jobs.instance_file = ?"
+            args += (instance_file,)
+        query += order
+
+        with closing(self._connect()) as conn:
+            return conn.execute(query, args).fetchall()
+
+
+def _heartbeat(queue, job_id, worker_id, stop_event, on_lease_lost):
+    """Renova o lease a cada lease_timeout / 3 segundos até stop_event ser sinalizado"""
+    while not stop_event.wait(queue.lease_timeout / 3):
+        if not queue.renew_lease(job_id, worker_id):
+            on_lease_lost()
+            return
+
+
+def run_worker(db_path, worker_id=None, poll_interval=2.0, exit_when_empty=True, lease_timeout=3600.0):
+    """
+    Loop de um worker: pega jobs, executa o SA e grava o resultado.
+    Com exit_when_empty=True o worker termina quando não há mais jobs abertos.
+    """
+    queue = JobQueue(db_path, lease_timeout=lease_timeout)
+    if worker_id is None:
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    completed = 0
+    while True:
+        job = queue.claim_job(worker_id)
+        if job is None:
+            queue.requeue_expired()
+            if exit_when_empty and not queue.has_open_jobs():
+                break
+            time.sleep(poll_interval)
+            continue
+
+        stop_heartbeat = threading.Event()
+        heartbeat = None
+        try:
+            sa = SimulatedAnnealing(job['instance_file'], job['params'], seed=job['seed'])
+            # Renova o lease durante a execução; se outro worker pegou o job, interrompe o SA
+            heartbeat = threading.Thread(target=_heartbeat, daemon=True,
+                                         args=(queue, job['id'], worker_id, stop_heartbeat, sa.request_stop))
+            heartbeat.start()
+            result = sa.solve(verbose=False)
+        except Exception as exc:
+            queue.fail_job(job['id'], worker_id, exc)
+            print(f"  ✗ [{worker_id}] Job {job['id']} falhou: {exc}")
+            continue
+        finally:
+            stop_heartbeat.set()
+            if heartbeat is not None:
+                heartbeat.join()
+
+        if not queue.complete_job(job['id'], worker_id, result, keep_history=bool(job['keep_history'])):
+            print(f"  ! [{worker_id}] Job {job['id']} descartado: o lease foi perdido para outro worker")
+            continue
+        completed += 1
+        print(f"  ✓ [{worker_id}] {job['cooling_schedule']} seed {job['seed']} - "
+              f"Custo final: {result['best_cost']:.2f}")
+
+    return completed
+
+
+def run_local_workers(db_path, n_workers, lease_timeout=3600.0, exit_when_empty=True):
+    """Sobe n_workers processos locais consumindo a mesma fila e espera todos terminarem"""
+    processes = []
+    for _ in range(n_workers):
+        process = multiprocessing.Process(target=run_worker, args=(db_path,),
+                                          kwargs={'lease_timeout': lease_timeout,
+                                                  'exit_when_empty': exit_when_empty})
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker da fila SQLite de execuções do SA")
+    parser.add_argument('db_path', help="Arquivo SQLite da fila (pode estar em um sistema de arquivos compartilhado)")
+    parser.add_argument('--workers', type=int, default=1, help="Número de processos locais")
+    parser.add_argument('--lease-timeout', type=float, default=3600.0,
+                        help="Segundos até um job em execução voltar para a fila")
+    parser.add_argument('--wait', action='store_true',
+                        help="Continua esperando novos jobs em vez de sair quando a fila esvazia")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_local_workers(args.db_path, args.workers, lease_timeout=args.lease_timeout,
+                          exit_when_empty=not args.wait)
+    else:
+        run_worker(args.db_path, exit_when_empty=not args.wait, lease_timeout=args.lease_timeout)
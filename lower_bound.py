@@ -0,0 +1,193 @@
+import hashlib
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from simulated_annealing import SimulatedAnnealing
+from distance_storage import PackedDistanceMatrix, build_distance_matrix
+
+
+# Incrementar se o cálculo do limite mudar (invalida os limites gravados em disco)
+BOUND_VERSION = '1.0'
+
+# Limites já calculados neste processo (por instância, mesma chave usada em disco, ou por matriz)
+_bound_cache = {}
+
+
+def _dense_matrix(distance_matrix):
+    if isinstance(distance_matrix, PackedDistanceMatrix):
+        distance_matrix = distance_matrix.toarray()
+    return np.asarray(distance_matrix, dtype=np.float64)
+
+
+def _one_tree(costs):
+    """
+    1-tree mínima: árvore geradora mínima (Prim vetorizado) sobre as cidades 1..n-1
+    mais as duas arestas mais baratas da cidade 0. Retorna (custo, graus).
+    """
+    n = len(costs)
+    degrees = np.zeros(n, dtype=np.int64)
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = True  # A cidade 0 fica fora da árvore
+    in_tree[1] = True
+
+    key = costs[1].copy()
+    key[in_tree] = np.inf
+    parent = np.ones(n, dtype=np.int64)
+    total = 0.0
+
+    for _ in range(n - 2):
+        v = int(np.argmin(key))
+        total += key[v]
+        degrees[v] += 1
+        degrees[parent[v]] += 1
+        in_tree[v] = True
+        key[v] = np.inf
+
+        closer = (costs[v] < key) & ~in_tree
+        key[closer] = costs[v][closer]
+        parent[closer] = v
+
+    nearest = np.argpartition(costs[0, 1:], 2)[:2] + 1
+    total += costs[0, nearest].sum()
+    degrees[0] = 2
+    degrees[nearest] += 1
+    return total, degrees
+
+
+def _nearest_neighbor_cost(matrix):
+    """Custo do tour do vizinho mais próximo (limite superior para o tamanho do passo)"""
+    n = len(matrix)
+    visited = np.zeros(n, dtype=bool)
+    current = 0
+    visited[0] = True
+    cost = 0.0
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, matrix[current])
+        nxt = int(np.argmin(row))
+        cost += row[nxt]
+        visited[nxt] = True
+        current = nxt
+    return cost + matrix[current, 0]
+
+
+def held_karp_bound(distance_matrix, max_iterations=1000, patience=20, upper_bound=None):
+    """
+    Limite inferior de Held-Karp: maximiza o custo da 1-tree com penalidades pi nas cidades
+    por otimização por subgradiente (passo de Polyak, que cai pela metade quando o limite
+    não melhora por `patience` iterações). Com distâncias inteiras o limite é arredondado para cima.
+    """
+    is_integer = np.issubdtype(getattr(distance_matrix, 'dtype', np.float64), np.integer)
+    matrix = _dense_matrix(distance_matrix)
+    n = len(matrix)
+    if n < 3:
+        return float(matrix.sum() / 2)
+
+    if upper_bound is None:
+        upper_bound = _nearest_neighbor_cost(matrix)
+
+    pi = np.zeros(n)
+    best = -np.inf
+    step_scale = 2.0
+    without_improvement = 0
+
+    for _ in range(max_iterations):
+        tree_cost, degrees = _one_tree(matrix + pi[:, np.newaxis] + pi[np.newaxis, :])
+        bound = tree_cost - 2 * pi.sum()
+
+        if bound > best + 1e-9:
+            best = bound
+            without_improvement = 0
+        else:
+            without_improvement += 1
+            if without_improvement >= patience:
+                step_scale /= 2
+                without_improvement = 0
+
+        subgradient = degrees - 2
+        norm = float(subgradient @ subgradient)
+        if norm == 0:
+            # A 1-tree é um tour: o limite é o ótimo
+            break
+        if step_scale < 1e-6:
+            break
+        pi += step_scale * max(upper_bound - bound, 0.0) / norm * subgradient
+
+    if is_integer:
+        return float(math.ceil(best - 1e-6))
+    return float(best)
+
+
+def matrix_lower_bound(distance_matrix, **kwargs):
+    """
+    held_karp_bound() com cache em memória pela própria matriz (conteúdo, formato e
+    parâmetros), para matrizes que não vêm direto de um arquivo de instância.
+    """
+    packed = isinstance(distance_matrix, PackedDistanceMatrix)
+    data = np.ascontiguousarray(distance_matrix.data if packed else distance_matrix)
+    digest = hashlib.sha256(data.tobytes()).hexdigest()
+    options = json.dumps(kwargs, sort_keys=True)
+    key = f"matrix:{digest}:{packed}:{data.dtype.str}:{data.shape}:{options}:{BOUND_VERSION}"
+
+    if key not in _bound_cache:
+        _bound_cache[key] = held_karp_bound(distance_matrix, **kwargs)
+    return _bound_cache[key]
+
+
+def _read_bound(path):
+    """Limite gravado em disco, ou None se o arquivo não existe ou está incompleto"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)['lower_bound']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+
+def _write_bound(path, entry):
+    """Grava de forma atômica: execuções paralelas nunca leem um arquivo pela metade"""
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def instance_lower_bound(instance_file, distance_dtype='float64', cache_dir='.sa_cache', **kwargs):
+    """
+    Limite de Held-Karp de uma instância, calculado uma única vez: fica em memória e em
+    cache_dir (chave = hash do conteúdo da instância + tipo de distância + parâmetros do
+    held_karp_bound + BOUND_VERSION).
+    """
+    with open(instance_file, 'rb') as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+    options = json.dumps(kwargs, sort_keys=True)
+    key = hashlib.sha256(f"{content_hash}:{distance_dtype}:{options}:{BOUND_VERSION}".encode('utf-8')).hexdigest()
+
+    if key in _bound_cache:
+        return _bound_cache[key]
+
+    path = os.path.join(cache_dir, f"bound_{key}.json") if cache_dir else None
+    bound = _read_bound(path) if path else None
+    if bound is None:
+        cities = SimulatedAnnealing._load_cities_from_file(instance_file)
+        bound = held_karp_bound(build_distance_matrix(cities, distance_dtype), **kwargs)
+        if path:
+            _write_bound(path, {'instance_file': instance_file, 'distance_dtype': distance_dtype,
+                                'options': kwargs, 'lower_bound': bound})
+
+    _bound_cache[key] = bound
+    return bound
+
+
+def gap_to_bound(cost, bound):
+    """Gap percentual do custo em relação ao limite inferior"""
+    return (cost - bound) / bound * 100 if bound > 0 else float('inf')
@@ -1,5 +1,9 @@
 from simulated_annealing import SimulatedAnnealing
 from graphs import GraphGenerator
+from job_queue import JobQueue, run_local_workers
+from result_cache import ResultCache
+from anytime_profile import time_to_target_samples
+from lower_bound import instance_lower_bound, gap_to_bound
 import numpy as np
 
 def calculate_statistics(costs):
@@ -41,6 +45,28 @@ def print_statistics_table(stats_dict):
     print("Nota: Desvio Padrão calculado usando fórmula AMOSTRAL (n-1)")
     print("="*100)
 
+def print_time_to_target_table(traces_by_schedule, target):
+    """Imprime, para cada schedule, a taxa de sucesso e o tempo mediano até atingir o custo alvo."""
+    print("\n" + "="*75)
+    print(f"TEMPO ATÉ O ALVO (custo <= {target:.2f})")
+    print("="*75)
+    print(f"{'Schedule':<15} | {'Sucesso':<10} | {'Mediana (s)':<12} | {'Mínimo (s)':<12} | {'Máximo (s)':<12}")
+    print("-"*75)
+    
+    for schedule, traces in traces_by_schedule.items():
+        samples = np.array(time_to_target_samples(traces, target))
+        reached = samples[np.isfinite(samples)]
+        success = f"{len(reached)}/{len(samples)}"
+        name = schedule.replace('_', ' ').title()
+        if len(reached) > 0:
+            # Mediana considera as falhas como tempo infinito
+            median = np.median(samples)
+            print(f"{name:<15} | {success:<10} | {median:<12.4f} | {reached.min():<12.4f} | {reached.max():<12.4f}")
+        else:
+            print(f"{name:<15} | {success:<10} | {'-':<12} | {'-':<12} | {'-':<12}")
+    
+    print("="*75)
+
 def main():
     INSTANCE_FILE = 'Instancias/51_cidades.txt'
     T_0 = 1000.0
@@ -51,6 +77,18 @@ def main():
     SEEDS = [42, 123, 456, 789, 1011, 1314, 1617, 1920, 2223, 2526]
 
     # INSTANCE_FILE = 'Instancias/100_cidades.txt'
+
+    # Fila SQLite: distribui o sweep entre vários processos/máquinas (ver job_queue.py)
+    USE_JOB_QUEUE = False
+    JOB_DB = 'sweep.db'
+    N_WORKERS = 4
+
+    # Cache de resultados: execuções idênticas (instância, params, seed) não são refeitas
+    USE_RESULT_CACHE = True
+    RESULT_CACHE_DIR = '.sa_cache'
+
+    # Alvo das análises de tempo (TTT): custo <= fator * melhor custo encontrado no sweep
+    ANYTIME_TARGET_FACTOR = 1.05
     
     params_base = {
         'T_0': T_0,
@@ -61,13 +99,24 @@ def main():
         'reheat_temp': T_0 * 0.3,  # Reaquece para 30% da temperatura inicial
         'stagnation_limit': 80000,  # Reaquece após 20000 iterações sem melhoria
         'progressive_cooling': True,  # Ativa resfriamento progressivo
-        'reheat_cooling_rate': 0.95  # Taxa de resfriamento após reaquecimento (95% por iteração)
+        'reheat_cooling_rate': 0.95,  # Taxa de resfriamento após reaquecimento (95% por iteração)
+        'distance_dtype': 'float64',  # 'float32' ou 'nint' (inteiro TSPLIB) reduzem a memória da matriz
+        'packed_distances': False,  # Guarda só o triângulo superior da matriz
+        'restart_strategy': 'current',  # 'elite' ou 'elite_kick' recomeçam do pool de elite na estagnação
+        'batch_size': 1,  # > 1 avalia vários vizinhos por passo de forma vetorizada
+        'batch_rule': 'metropolis',  # Ou 'heat_bath'
+        'target_gap': None  # Ex.: 1.0 encerra a execução a 1% do limite inferior
     }
     
+    # Limite inferior de Held-Karp (calculado uma vez por instância e guardado em cache)
+    LOWER_BOUND = instance_lower_bound(INSTANCE_FILE, params_base['distance_dtype'], cache_dir=RESULT_CACHE_DIR)
+    params_base['lower_bound'] = LOWER_BOUND
+    
     cooling_schedules = ['schedule_0', 'schedule_5', 'schedule_6', 'schedule_8', 'schedule_9']
     
     results = {}  # Resultado de UMA execução (para gráficos individuais)
     multiple_runs_costs = {}  # Custos de TODAS as 10 execuções (para boxplot e estatísticas)
+    anytime_traces = {}  # Curvas (tempo, melhor custo) de todas as execuções
     
     print("\n" + "="*60)
     print("SIMULATED ANNEALING - PROBLEMA DO CAIXEIRO VIAJANTE")
@@ -78,47 +127,78 @@ def main():
     print(f"Máximo de iterações: {MAX_ITERATIONS}")
     print(f"SAmax (iterações por temperatura): {SA_MAX}")
     print(f"Número de execuções por schedule: {N_RUNS}")
+    print(f"Limite inferior (Held-Karp): {LOWER_BOUND:.2f}")
     print("="*60)
     
-    for schedule in cooling_schedules:
-        print(f"\n{'='*60}")
-        print(f"Executando {N_RUNS} runs para {schedule.replace('_', ' ').title()}")
-        print(f"{'='*60}")
+    if USE_JOB_QUEUE:
+        # Grava a grade na fila; workers extras podem rodar `python job_queue.py sweep.db`
+        queue = JobQueue(JOB_DB)
+        sweep_key, new_jobs = queue.enqueue_sweep(INSTANCE_FILE, cooling_schedules, SEEDS, params_base)
+        print(f"\nJobs novos na fila '{JOB_DB}': {new_jobs}")
+        run_local_workers(JOB_DB, N_WORKERS)
         
-        schedule_costs = []  # Armazena os custos finais das 10 execuções
+        # Agregação a partir do banco (só os jobs deste sweep, não os de sweeps anteriores)
+        results, multiple_runs_costs = queue.load_results(INSTANCE_FILE, sweep_key)
+        anytime_traces = queue.load_anytime_traces(INSTANCE_FILE, sweep_key)
+        for schedule, schedule_costs in multiple_runs_costs.items():
+            stats = calculate_statistics(schedule_costs)
+            print(f"\n  Estatísticas do {schedule.replace('_', ' ').title()}:")
+            print(f"    Média:       {stats['mean']:.2f}")
+            print(f"    Desvio Pad:  {stats['std']:.2f}")
+            print(f"    Mínimo:      {stats['min']:.2f}")
+            print(f"    Máximo:      {stats['max']:.2f}")
+            print(f"    Mediana:     {stats['median']:.2f}")
+    else:
+        cache = ResultCache(RESULT_CACHE_DIR) if USE_RESULT_CACHE else None
         
-        for run_idx, seed in enumerate(SEEDS):
-            params = params_base.copy()
-            params['cooling_schedule'] = schedule
-            
-            print(f"\n--- Run {run_idx + 1}/{N_RUNS} (Seed: {seed}) ---")
+        for schedule in cooling_schedules:
+            print(f"\n{'='*60}")
+            print(f"Executando {N_RUNS} runs para {schedule.replace('_', ' ').title()}")
+            print(f"{'='*60}")
+        
+            schedule_costs = []  # Armazena os custos finais das 10 execuções
+            schedule_traces = []
+        
+            for run_idx, seed in enumerate(SEEDS):
+                params = params_base.copy()
+                params['cooling_schedule'] = schedule
             
-            # Cria instância do SA com seed específica
-            sa = SimulatedAnnealing(INSTANCE_FILE, params, seed=seed)
+                print(f"\n--- Run {run_idx + 1}/{N_RUNS} (Seed: {seed}) ---")
             
-            # Resolve o problema (verbose=False para não poluir o terminal)
-            result = sa.solve(verbose=(run_idx == 0))  # Mostra detalhes só do primeiro run
+                if cache is not None:
+                    # Reaproveita o resultado se esta execução já estiver no cache; só o primeiro
+                    # run de cada schedule (usado nos gráficos) guarda o histórico
+                    result = cache.solve(INSTANCE_FILE, params, seed=seed, verbose=(run_idx == 0),
+                                         record_history=(run_idx == 0))
+                else:
+                    # Cria instância do SA com seed específica
+                    sa = SimulatedAnnealing(INSTANCE_FILE, params, seed=seed)
+                
+                    # Resolve o problema (verbose=False para não poluir o terminal)
+                    result = sa.solve(verbose=(run_idx == 0))  # Mostra detalhes só do primeiro run
             
-            # Armazena o custo final desta execução
-            schedule_costs.append(result['best_cost'])
+                # Armazena o custo final desta execução
+                schedule_costs.append(result['best_cost'])
+                schedule_traces.append(result['anytime_trace'])
             
-            print(f"  ✓ Run {run_idx + 1} concluído - Custo final: {result['best_cost']:.2f}")
+                print(f"  ✓ Run {run_idx + 1} concluído - Custo final: {result['best_cost']:.2f}")
             
-            # Salva o resultado da primeira execução para gerar gráficos depois
-            if run_idx == 0:
-                results[schedule] = result
+                # Salva o resultado da primeira execução para gerar gráficos depois
+                if run_idx == 0:
+                    results[schedule] = result
         
-        # Armazena todos os custos deste schedule
-        multiple_runs_costs[schedule] = schedule_costs
+            # Armazena todos os custos deste schedule
+            multiple_runs_costs[schedule] = schedule_costs
+            anytime_traces[schedule] = schedule_traces
         
-        # Calcula e mostra estatísticas para este schedule
-        stats = calculate_statistics(schedule_costs)
-        print(f"\n  Estatísticas do {schedule.replace('_', ' ').title()}:")
-        print(f"    Média:       {stats['mean']:.2f}")
-        print(f"    Desvio Pad:  {stats['std']:.2f}")
-        print(f"    Mínimo:      {stats['min']:.2f}")
-        print(f"    Máximo:      {stats['max']:.2f}")
-        print(f"    Mediana:     {stats['median']:.2f}")
+            # Calcula e mostra estatísticas para este schedule
+            stats = calculate_statistics(schedule_costs)
+            print(f"\n  Estatísticas do {schedule.replace('_', ' ').title()}:")
+            print(f"    Média:       {stats['mean']:.2f}")
+            print(f"    Desvio Pad:  {stats['std']:.2f}")
+            print(f"    Mínimo:      {stats['min']:.2f}")
+            print(f"    Máximo:      {stats['max']:.2f}")
+            print(f"    Mediana:     {stats['median']:.2f}")
     
     # Calcula estatísticas para todos os schedules
     print("\n" + "="*60)
@@ -159,13 +239,24 @@ def main():
     
     # Boxplot comparativo
     print("\n  - Boxplot comparativo (10 runs)...")
-    graph_gen.plot_boxplot_comparison(multiple_runs_costs, 'boxplot_comparacao_schedules.png')
+    graph_gen.plot_boxplot_comparison(multiple_runs_costs, 'boxplot_comparacao_schedules.png',
+                                      reference=LOWER_BOUND, reference_label='Limite Inferior')
+    
+    # Análise anytime: qualidade em função do tempo de execução
+    target = ANYTIME_TARGET_FACTOR * min(min(costs) for costs in multiple_runs_costs.values())
+    print("\n  - Qualidade vs. tempo...")
+    graph_gen.plot_quality_vs_time(anytime_traces, 'qualidade_vs_tempo.png', reference=LOWER_BOUND)
+    print("  - CDF do tempo até o alvo...")
+    graph_gen.plot_time_to_target_cdf(anytime_traces, target, 'cdf_tempo_ate_alvo.png')
+    print("  - Perfil de desempenho...")
+    graph_gen.plot_performance_profile(anytime_traces, target, 'perfil_desempenho.png')
+    print_time_to_target_table(anytime_traces, target)
     
     # Resultados finais
     print("\n" + "="*60)
-    print("RESULTADOS FINAIS - COMPARAÇÃO COM ÓTIMO CONHECIDO")
+    print("RESULTADOS FINAIS - COMPARAÇÃO COM LIMITE INFERIOR")
     print("="*60)
-    print(f"Ótimo conhecido para 51 cidades (eil51): 426.00")
+    print(f"Limite inferior de Held-Karp para {INSTANCE_FILE}: {LOWER_BOUND:.2f}")
     print("="*60)
     
     schedule_names = {
@@ -176,14 +267,14 @@ def main():
         'schedule_9': 'COOLING SCHEDULE 9'
     }
     
-    print(f"\n{'Schedule':<20} | {'Melhor Resultado':<18} | {'Gap do Ótimo':<15} | {'Mediana':<10}")
+    print(f"\n{'Schedule':<20} | {'Melhor Resultado':<18} | {'Gap do Limite':<15} | {'Mediana':<10}")
     print("-"*75)
     
     for schedule_name in cooling_schedules:
         stats = all_statistics[schedule_name]
         best = stats['min']
         median = stats['median']
-        gap = ((best - 426) / 426) * 100
+        gap = gap_to_bound(best, LOWER_BOUND)
         
         name = schedule_names.get(schedule_name, schedule_name)
         print(f"{name:<20} | {best:<18.2f} | {gap:>+14.2f}% | {median:<10.2f}")
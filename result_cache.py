@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+from simulated_annealing import SimulatedAnnealing, SOLVER_VERSION
+
+
+# Séries do histórico guardadas como arrays: listas de np.float64 viram um objeto por item no pickle
+_HISTORY_SERIES = ('iterations', 'temperatures', 'current_costs', 'best_costs')
+
+
+def _pack_history(result):
+    """Cópia rasa do resultado com as séries do histórico convertidas para np.ndarray"""
+    history = result.get('history')
+    if not history:
+        return result
+    packed = dict(history)
+    for name in _HISTORY_SERIES:
+        if name in packed:
+            packed[name] = np.asarray(packed[name])
+    return dict(result, history=packed)
+
+
+def _unpack_history(result):
+    """Volta as séries do histórico para listas (formato de solve(), usado pelos gráficos)"""
+    history = result.get('history')
+    if history:
+        for name in _HISTORY_SERIES:
+            if isinstance(history.get(name), np.ndarray):
+                history[name] = history[name].tolist()
+    return result
+
+
+class ResultCache:
+    """
+    Cache em disco dos resultados de solve(), endereçado pelo conteúdo.
+
+    A chave é o hash do conteúdo da instância + params completos + seed + versão do solver,
+    então renomear o arquivo da instância não invalida o cache, mas mudar qualquer parâmetro sim.
+    O tamanho total é limitado por max_size_bytes com remoção LRU (usa o mtime de cada entrada).
+    """
+
+    def __init__(self, cache_dir='.sa_cache', max_size_bytes=2 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self._instance_hashes = {}
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _hash_instance(self, instance_file):
+        """Hash do conteúdo da instância (memorizado por caminho, tamanho e mtime)"""
+        stat = os.stat(instance_file)
+        memo_key = (os.path.abspath(instance_file), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._instance_hashes:
+            with open(instance_file, 'rb') as f:
+                self._instance_hashes[memo_key] = hashlib.sha256(f.read()).hexdigest()
+        return self._instance_hashes[memo_key]
+
+    def make_key(self, instance_file, params, seed, record_history=True):
+        """Gera a chave da execução (instância, params, seed, histórico, versão do solver)"""
+        payload = json.dumps({
+            'instance': self._hash_instance(instance_file),
+            'params': params,
+            'seed': seed,
+            'record_history': record_history,
+            'solver_version': SOLVER_VERSION
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Retorna o resultado armazenado ou None; um acerto atualiza a posição LRU"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        os.utime(path)
+        return _unpack_history(result)
+
+    def put(self, key, result):
+        """Grava o resultado de forma atômica e aplica o limite de tamanho"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(_pack_history(result), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """Remove as entradas menos usadas recentemente até caber em max_size_bytes"""
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, name in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        """Apaga todas as entradas do cache"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def solve(self, instance_file, params, seed=42, verbose=True, record_history=True):
+        """
+        Equivalente a SimulatedAnnealing(instance_file, params, seed).solve(verbose, record_history),
+        mas devolve o resultado armazenado quando a mesma execução já foi feita.
+        Com record_history=False a entrada não guarda o histórico por iteração (bem menor),
+        mas uma entrada com histórico da mesma execução também é aproveitada.
+        """
+        key = self.make_key(instance_file, params, seed, record_history)
+        result = self.get(key)
+        if result is None and not record_history:
+            result = self.get(self.make_key(instance_file, params, seed, record_history=True))
+        if result is not None:
+            if verbose:
+                print(f"  (cache) Resultado reaproveitado - Seed {seed} - Custo final: {result['best_cost']:.2f}")
+            return result
+
+        sa = SimulatedAnnealing(instance_file, params, seed=seed)
+        result = sa.solve(verbose=verbose, record_history=record_history)
+        self.put(key, result)
+        return result
@@ -0,0 +1,147 @@
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from simulated_annealing import SimulatedAnnealing
+from distance_storage import PackedDistanceMatrix, build_distance_matrix, matrix_layout
+
+
+def _attach_block(name, untrack):
+    """Abre um bloco de memória compartilhada existente sem assumir a responsabilidade de apagá-lo"""
+    try:
+        # Python 3.13+: não registra o bloco no resource tracker deste processo
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            # Processo sem relação com o criador: evita que o tracker dele apague o bloco ao sair
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class SharedInstance:
+    """
+    Instância (coordenadas + matriz de distâncias) publicada uma única vez em memória
+    compartilhada. Workers se conectam com attach(handle) e recebem views NumPy somente
+    leitura, sem copiar os n² valores da matriz.
+
+    O processo criador é o dono dos blocos: close() + unlink() (ou o bloco with) os apagam.
+    Se o criador morrer, o resource tracker do multiprocessing apaga os blocos; a morte de
+    um worker não afeta os demais.
+    """
+
+    def __init__(self, handle, coords_block, matrix_block, owner):
+        self.handle = handle
+        self.owner = owner
+        self._blocks = [coords_block, matrix_block]
+
+        self.coords = np.ndarray((handle['n_cities'], 2), dtype=np.float64, buffer=coords_block.buf)
+        matrix_data = np.ndarray(handle['matrix_shape'], dtype=np.dtype(handle['matrix_dtype']),
+                                 buffer=matrix_block.buf)
+        self.coords.flags.writeable = False
+        matrix_data.flags.writeable = False
+
+        if handle['packed_distances']:
+            self.distance_matrix = PackedDistanceMatrix(matrix_data, handle['n_cities'])
+        else:
+            self.distance_matrix = matrix_data
+
+    @classmethod
+    def create(cls, instance_file, distance_dtype='float64', packed_distances=False):
+        """Carrega a instância, constrói a matriz e publica tudo em memória compartilhada"""
+        cities = SimulatedAnnealing._load_cities_from_file(instance_file)
+        coords = np.asarray(cities, dtype=np.float64).reshape(-1, 2)
+        matrix_dtype, matrix_shape = matrix_layout(coords, distance_dtype, packed_distances)
+
+        coords_block = shared_memory.SharedMemory(create=True, size=max(coords.nbytes, 1))
+        matrix_block = shared_memory.SharedMemory(create=True,
+                                                  size=max(int(np.prod(matrix_shape)) * matrix_dtype.itemsize, 1))
+        np.ndarray(coords.shape, dtype=coords.dtype, buffer=coords_block.buf)[:] = coords
+        # A matriz é escrita direto no bloco compartilhado, sem uma cópia privada intermediária
+        matrix_data = np.ndarray(matrix_shape, dtype=matrix_dtype, buffer=matrix_block.buf)
+        build_distance_matrix(coords, distance_dtype, packed_distances, out=matrix_data)
+        del matrix_data
+
+        handle = {
+            'path': instance_file,
+            'n_cities': len(cities),
+            'distance_dtype': distance_dtype,
+            'packed_distances': packed_distances,
+            'coords_name': coords_block.name,
+            'matrix_name': matrix_block.name,
+            'matrix_dtype': matrix_dtype.str,
+            'matrix_shape': matrix_shape
+        }
+        return cls(handle, coords_block, matrix_block, owner=True)
+
+    @classmethod
+    def attach(cls, handle, untrack=False):
+        """
+        Conecta a uma instância publicada por create(). O handle é um dict pequeno e
+        serializável. Use untrack=True em processos que não foram criados pelo
+        multiprocessing a partir do processo dono (Python < 3.13).
+        """
+        coords_block = _attach_block(handle['coords_name'], untrack)
+        matrix_block = _attach_block(handle['matrix_name'], untrack)
+        return cls(handle, coords_block, matrix_block, owner=False)
+
+    @property
+    def cities(self):
+        """Coordenadas no formato de lista de tuplas usado pelo SA e pelos gráficos"""
+        return [(float(x), float(y)) for x, y in self.coords]
+
+    def create_solver(self, params, seed=42):
+        """Cria um SimulatedAnnealing usando a matriz compartilhada (sem cópia)"""
+        params = dict(params)
+        params['distance_dtype'] = self.handle['distance_dtype']
+        params['packed_distances'] = self.handle['packed_distances']
+        return SimulatedAnnealing(self.handle['path'], params, seed=seed,
+                                  cities=self.cities, distance_matrix=self.distance_matrix)
+
+    def close(self):
+        """Libera as views e o mapeamento deste processo (solvers que usam a matriz devem ter sido descartados)"""
+        self.coords = None
+        self.distance_matrix = None
+        for block in self._blocks:
+            block.close()
+
+    def unlink(self):
+        """Apaga os blocos do sistema (somente o dono)"""
+        if self.owner:
+            for block in self._blocks:
+                try:
+                    block.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        self.unlink()
+
+
+# Instâncias já conectadas neste processo (cada worker conecta uma única vez)
+_attached_instances = {}
+
+
+def attached_instance(handle):
+    """Instância compartilhada conectada neste processo (conecta só na primeira vez)"""
+    key = handle['matrix_name']
+    if key not in _attached_instances:
+        _attached_instances[key] = SharedInstance.attach(handle)
+    return _attached_instances[key]
+
+
+def release_attached(keep=()):
+    """Fecha as conexões deste processo às instâncias cujo nome de matriz não está em keep"""
+    for key in list(_attached_instances):
+        if key not in keep:
+            _attached_instances.pop(key).close()
+
+
+def solve_shared(handle, params, seed=42, record_history=True):
+    """Função para pools de processos: conecta à instância compartilhada e executa o SA"""
+    sa = attached_instance(handle).create_solver(params, seed)
+    return sa.solve(verbose=False, record_history=record_history)
@@ -1,13 +1,31 @@
 import numpy as np
 import random
+import threading
+import time
+
+from distance_storage import build_distance_matrix
+from elite_pool import ElitePool, double_bridge
+
+# Incrementar sempre que uma mudança alterar os resultados (invalida o cache de resultados)
+SOLVER_VERSION = '1.7'
 
 class SimulatedAnnealing:
-    def __init__(self, instance_file, params, seed=42):
+    def __init__(self, instance_file, params, seed=42, cities=None, distance_matrix=None):
+        """
+        cities/distance_matrix permitem reaproveitar uma instância já carregada
+        (ex.: daemon com cache de instâncias); nesse caso o arquivo não é lido.
+        """
         self.seed = seed
-        self.cities = self._load_cities_from_file(instance_file)
+        # Gerador próprio: execuções em threads diferentes não compartilham estado aleatório
+        self.rng = random.Random(seed)
+        self.cities = cities if cities is not None else self._load_cities_from_file(instance_file)
         self.n_cities = len(self.cities)
-        self.distance_matrix = self._calculate_distance_matrix()
-        self.normalized_distance_matrix = self._normalize_distance_matrix()
+        
+        # Armazenamento da matriz: 'float64', 'float32' ou 'nint' (inteiro TSPLIB), opcionalmente compactada
+        self.distance_dtype = params.get('distance_dtype', 'float64')
+        self.packed_distances = params.get('packed_distances', False)
+        self.distance_matrix = distance_matrix if distance_matrix is not None else self._calculate_distance_matrix()
+        self._normalized_distance_matrix = None  # Calculada só quando usada
         
         self.T_0 = params['T_0']
         self.T_min = params['T_min']
@@ -26,6 +44,36 @@ class SimulatedAnnealing:
         # Novo: parâmetros para reaquecimento progressivo
         self.progressive_cooling = params.get('progressive_cooling', True)
         self.reheat_cooling_rate = params.get('reheat_cooling_rate', 0.95)  # Taxa de resfriamento após reaquecimento
+        
+        # Pool de elite: no reaquecimento, 'current' continua da rota atual, 'elite' recomeça de uma
+        # rota do pool e 'elite_kick' recomeça de uma rota do pool perturbada (double-bridge)
+        self.restart_strategy = params.get('restart_strategy', 'current')
+        if self.restart_strategy not in ('current', 'elite', 'elite_kick'):
+            raise ValueError(f"Estratégia de reinício '{self.restart_strategy}' não reconhecida")
+        self.elite_pool_size = params.get('elite_pool_size', 0 if self.restart_strategy == 'current' else 10)
+        # Temperatura do recomeço a partir do pool; None continua na temperatura do schedule
+        # (reaquecer até reheat_temp embaralharia a rota de elite logo em seguida)
+        self.elite_restart_temp = params.get('elite_restart_temp')
+        
+        # Propostas em lote: avalia batch_size vizinhos de uma vez (vetorizado) e escolhe um pela
+        # regra 'metropolis' (melhor dos k + critério de Metropolis) ou 'heat_bath' (amostra por exp(-delta/T))
+        self.batch_size = params.get('batch_size', 1)
+        self.batch_rule = params.get('batch_rule', 'metropolis')
+        if self.batch_rule not in ('metropolis', 'heat_bath'):
+            raise ValueError(f"Regra de seleção '{self.batch_rule}' não reconhecida")
+        self.np_rng = np.random.default_rng(seed)
+        
+        # Parada antecipada: termina quando o melhor custo fica a até target_gap % do limite inferior
+        self.target_gap = params.get('target_gap')
+        self.lower_bound = params.get('lower_bound')
+        if self.target_gap is not None and self.lower_bound is None:
+            # Importado aqui porque lower_bound depende deste módulo
+            from lower_bound import instance_lower_bound, matrix_lower_bound
+            if instance_file is not None and distance_matrix is None:
+                # Calculado uma vez por instância (memória + disco), não a cada seed
+                self.lower_bound = instance_lower_bound(instance_file, self.distance_dtype)
+            else:
+                self.lower_bound = matrix_lower_bound(self.distance_matrix)
 
         self.history = {
             'iterations': [],
@@ -33,10 +81,15 @@ class SimulatedAnnealing:
             'current_costs': [],
             'best_costs': [],
             'routes': [],
-            'reheat_points': []  # Marca quando houve reaquecimento
+            'reheat_points': [],  # Marca quando houve reaquecimento
+            'restart_points': []  # Marca quando recomeçou de uma rota do pool de elite
         }
         
-    def _load_cities_from_file(self, filepath):
+        # Pedido de parada vindo de request_stop(); consumido quando a execução termina
+        self._stop_event = threading.Event()
+        
+    @staticmethod
+    def _load_cities_from_file(filepath):
         """Carrega coordenadas das cidades do arquivo de instância"""
         cities = []
         reading_coords = False
@@ -73,37 +126,33 @@ class SimulatedAnnealing:
     
     def _calculate_distance_matrix(self):
         """Cria uma matriz nxn com distância entre cada par de cidades (distância euclidiana)"""
-        n = self.n_cities
-        matrix = np.zeros((n, n))
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    dx = self.cities[i][0] - self.cities[j][0]
-                    dy = self.cities[i][1] - self.cities[j][1]
-                    matrix[i][j] = np.sqrt(dx**2 + dy**2)
-        return matrix
+        return build_distance_matrix(self.cities, self.distance_dtype, self.packed_distances)
     
     def _normalize_distance_matrix(self):
         """Normaliza a matriz de distâncias para o intervalo [0, 1]"""
-        max_distance = np.max(self.distance_matrix)
+        max_distance = self.distance_matrix.max()
         if max_distance > 0:
             return self.distance_matrix / max_distance
-        return self.distance_matrix
+        return self.distance_matrix.astype(np.float64)
+    
+    @property
+    def normalized_distance_matrix(self):
+        """Matriz normalizada, criada na primeira vez que for pedida"""
+        if self._normalized_distance_matrix is None:
+            self._normalized_distance_matrix = self._normalize_distance_matrix()
+        return self._normalized_distance_matrix
     
     def _calculate_route_cost(self, route, use_normalized=False):
         """Soma as distâncias entre as cidades da rota e garante que volte ao início"""
-        cost = 0
         matrix = self.normalized_distance_matrix if use_normalized else self.distance_matrix
-        for i in range(len(route)):
-            city_a = route[i]
-            city_b = route[(i + 1) % len(route)]
-            cost += matrix[city_a][city_b]
-        return cost
+        route = np.asarray(route)
+        # Acumula em float64 mesmo quando a matriz é float32/inteira
+        return float(matrix[route, np.roll(route, -1)].sum(dtype=np.float64))
     
     def _generate_neighbor(self, route):
         """Cria solução "parecida" trocando duas cidades aleatórias (menos a primeira)"""
         new_route = route.copy()
-        i, j = random.sample(range(1, self.n_cities), 2)
+        i, j = self.rng.sample(range(1, self.n_cities), 2)
         new_route[i], new_route[j] = new_route[j], new_route[i]
         return new_route
     
@@ -113,10 +162,87 @@ class SimulatedAnnealing:
         Melhor operador de vizinhança para TSP, ajuda a evitar mínimos locais.
         """
         new_route = route.copy()
-        i, j = sorted(random.sample(range(1, self.n_cities), 2))
+        i, j = sorted(self.rng.sample(range(1, self.n_cities), 2))
         new_route[i:j+1] = reversed(new_route[i:j+1])
         return new_route
     
+    def _generate_batch_neighbor(self, route, T):
+        """
+        Sorteia batch_size movimentos (2-opt ou swap, com a mesma proporção do modo simples),
+        calcula todos os deltas de uma vez sobre a matriz de distâncias e escolhe um.
+        Retorna (nova_rota, delta, aceito_pela_regra); nova_rota é None se o heat-bath
+        escolher ficar na rota atual.
+        """
+        n = self.n_cities
+        k = self.batch_size
+        
+        i = self.np_rng.integers(1, n, size=k)
+        j = self.np_rng.integers(1, n - 1, size=k)
+        j = j + (j >= i)
+        lo = np.minimum(i, j)
+        hi = np.maximum(i, j)
+        if self.use_2opt:
+            is_2opt = self.np_rng.random(k) < 0.7
+        else:
+            is_2opt = np.zeros(k, dtype=bool)
+        
+        deltas = self._batch_deltas(np.asarray(route), lo, hi, is_2opt)
+        
+        if self.batch_rule == 'metropolis':
+            chosen = int(np.argmin(deltas))
+            accepted = False
+        else:
+            # Heat-bath entre os k vizinhos e a própria rota atual (delta 0)
+            energies = np.concatenate(([0.0], deltas))
+            if T > 0:
+                weights = np.exp(-(energies - energies.min()) / T)
+                option = int(self.np_rng.choice(k + 1, p=weights / weights.sum()))
+            else:
+                option = int(np.argmin(energies))
+            if option == 0:
+                return None, 0.0, False
+            chosen = option - 1
+            accepted = True
+        
+        a, b = int(lo[chosen]), int(hi[chosen])
+        new_route = route.copy()
+        if is_2opt[chosen]:
+            new_route[a:b+1] = reversed(new_route[a:b+1])
+        else:
+            new_route[a], new_route[b] = new_route[b], new_route[a]
+        return new_route, float(deltas[chosen]), accepted
+    
+    def _batch_deltas(self, route_array, lo, hi, is_2opt):
+        """
+        Variação de custo de cada movimento (lo < hi, posições 1..n-1): inversão do segmento
+        lo..hi (2-opt) ou troca das cidades em lo e hi (swap).
+        """
+        n = self.n_cities
+        before_lo = route_array[lo - 1]
+        city_lo = route_array[lo]
+        after_lo = route_array[lo + 1]
+        before_hi = route_array[hi - 1]
+        city_hi = route_array[hi]
+        after_hi = route_array[(hi + 1) % n]
+        
+        # Uma única consulta à matriz para as 8 arestas de todos os movimentos (na matriz
+        # compactada cada consulta tem custo fixo de conversão de índices)
+        sources = np.concatenate((before_lo, city_lo, before_lo, city_hi, city_hi, before_hi, city_lo, before_hi))
+        targets = np.concatenate((city_hi, after_hi, city_lo, after_hi, after_lo, city_lo, after_lo, city_hi))
+        # float64 evita overflow quando a matriz é inteira (nint)
+        edges = np.asarray(self.distance_matrix[sources, targets], dtype=np.float64).reshape(8, -1)
+        (d_before_lo_hi, d_lo_after_hi, d_before_lo_lo, d_hi_after_hi,
+         d_hi_after_lo, d_before_hi_lo, d_lo_after_lo, d_before_hi_hi) = edges
+        
+        # 2-opt: troca as arestas (antes_lo, lo) e (hi, depois_hi)
+        delta_2opt = d_before_lo_hi + d_lo_after_hi - d_before_lo_lo - d_hi_after_hi
+        # Swap: troca as quatro arestas ao redor das duas cidades
+        delta_swap = (d_before_lo_hi + d_hi_after_lo + d_before_hi_lo + d_lo_after_hi
+                      - d_before_lo_lo - d_lo_after_lo - d_before_hi_hi - d_hi_after_hi)
+        # Cidades vizinhas: o swap é a inversão de um segmento de 2 cidades
+        delta_swap = np.where(hi == lo + 1, delta_2opt, delta_swap)
+        return np.where(is_2opt, delta_2opt, delta_swap)
+    
     def _cooling_schedule_0(self, iteration, total_iterations):
         """Cooling Schedule 0 (Linear): T = T_0 - i * ((T_0 - T_N) / N)"""
         return self.T_0 - iteration * ((self.T_0 - self.T_min) / total_iterations)
@@ -161,12 +287,40 @@ class SimulatedAnnealing:
         else:
             raise ValueError(f"Cooling schedule '{self.cooling_schedule}' não reconhecido")
     
-    def solve(self, verbose=True):
-        random.seed(self.seed)
+    def request_stop(self):
+        """
+        Pede para a execução parar no fim da iteração atual (pode vir de outra thread).
+        Se nenhuma execução começou ainda, a próxima para logo no início.
+        """
+        self._stop_event.set()
+    
+    def solve(self, verbose=True, record_history=True, stop_event=None):
+        """Executa o SA até o fim e retorna o resultado"""
+        for snapshot in self.solve_iter(snapshot_interval=None, verbose=verbose,
+                                        record_history=record_history, stop_event=stop_event):
+            if snapshot['done']:
+                return snapshot['result']
+    
+    def solve_iter(self, snapshot_interval=1000, verbose=False, record_history=True, stop_event=None):
+        """
+        Versão geradora de solve(): a cada snapshot_interval iterações produz um snapshot leve
+        {'iteration', 'temperature', 'current_cost', 'best_cost', 'best_route', 'done'}, onde
+        best_route só vem preenchido quando o melhor custo melhorou desde o snapshot anterior.
+        O último snapshot tem done=True e o resultado completo em 'result'.
+        Com record_history=False o histórico por iteração não é guardado.
+        stop_event é um token de parada próprio desta execução (qualquer objeto com is_set(),
+        ex.: threading.Event); quem submete a execução deve criá-lo antes, para que um
+        cancelamento anterior ao início não se perca. Sem ele vale request_stop().
+        """
+        if stop_event is None:
+            stop_event = self._stop_event
+        self.rng.seed(self.seed)
+        self.np_rng = np.random.default_rng(self.seed)
         np.random.seed(self.seed)
+        start_time = time.perf_counter()
         
         current_route = list(range(self.n_cities))
-        random.shuffle(current_route[1:])  
+        self.rng.shuffle(current_route[1:])  
         
         initial_route = current_route.copy()
         current_cost = self._calculate_route_cost(current_route)
@@ -175,6 +329,10 @@ class SimulatedAnnealing:
         best_route = current_route.copy()
         best_cost = current_cost
         
+        # Curva anytime: (tempo decorrido, melhor custo), registrada só quando o melhor custo muda
+        anytime_times = [time.perf_counter() - start_time]
+        anytime_costs = [best_cost]
+        
         # Contador de estagnação (para reaquecimento)
         iterations_without_improvement = 0
         last_best_cost = best_cost
@@ -183,6 +341,24 @@ class SimulatedAnnealing:
         is_reheating = False
         reheat_start_iteration = 0
         base_temp_at_reheat = 0
+        reheat_peak_temp = self.reheat_temp
+        
+        # Melhor custo já enviado em snapshot (para só mandar a rota quando melhorar)
+        snapshot_best_cost = None
+        stopped_early = False
+        
+        elite_pool = ElitePool(self.elite_pool_size)
+        
+        # Custo que encerra a execução (gap alvo em relação ao limite inferior)
+        target_cost = None
+        if self.target_gap is not None:
+            target_cost = self.lower_bound * (1 + self.target_gap / 100)
+        reached_target_gap = target_cost is not None and best_cost <= target_cost
+        
+        # Estatísticas de aceitação (comparação entre proposta simples e em lote)
+        steps = 0
+        proposals = 0
+        accepted_moves = 0
         
         if verbose:
             schedule_name = self.cooling_schedule.replace('_', ' ').title()
@@ -197,27 +373,41 @@ class SimulatedAnnealing:
         
         # Loop principal
         iteration = 0
+        T = self.T_0
         while iteration < self.max_iterations:
             T = self._get_temperature(iteration, self.max_iterations)
             
             # Reaquecimento progressivo
             if iterations_without_improvement >= self.stagnation_limit:
                 if not is_reheating:
-                    # Inicia reaquecimento
-                    is_reheating = True
-                    reheat_start_iteration = iteration
-                    base_temp_at_reheat = T
-                    T = self.reheat_temp
                     iterations_without_improvement = 0
-                    self.history['reheat_points'].append(iteration)
-                    if verbose and iteration % 10000 == 0:
-                        print(f"  >>> Reaquecimento iniciado na iteração {iteration} para T={self.reheat_temp:.2f}")
+                    reheat_peak_temp = self.reheat_temp
+                    
+                    # Recomeça de uma rota de elite em vez da rota estagnada, na temperatura
+                    # elite_restart_temp (ou sem reaquecer, se não definida)
+                    if self.restart_strategy != 'current' and len(elite_pool) > 0:
+                        current_route, _ = elite_pool.sample(self.rng)
+                        if self.restart_strategy == 'elite_kick':
+                            current_route = double_bridge(current_route, self.rng)
+                        current_cost = self._calculate_route_cost(current_route)
+                        reheat_peak_temp = self.elite_restart_temp
+                        self.history['restart_points'].append(iteration)
+                    
+                    if reheat_peak_temp is not None:
+                        # Inicia reaquecimento
+                        is_reheating = True
+                        reheat_start_iteration = iteration
+                        base_temp_at_reheat = T
+                        T = reheat_peak_temp
+                        self.history['reheat_points'].append(iteration)
+                        if verbose and iteration % 10000 == 0:
+                            print(f"  >>> Reaquecimento iniciado na iteração {iteration} para T={reheat_peak_temp:.2f}")
             
             # Resfriamento progressivo após reaquecimento
             if is_reheating:
                 iterations_since_reheat = iteration - reheat_start_iteration
                 # Resfria progressivamente usando taxa geométrica
-                T = self.reheat_temp * (self.reheat_cooling_rate ** iterations_since_reheat)
+                T = reheat_peak_temp * (self.reheat_cooling_rate ** iterations_since_reheat)
                 
                 # Para o reaquecimento quando a temperatura cair abaixo da temperatura base
                 if T <= base_temp_at_reheat:
@@ -227,62 +417,142 @@ class SimulatedAnnealing:
             if T < self.T_min:
                 break
             
+            if stop_event.is_set() or reached_target_gap:
+                stopped_early = True
+                break
+            
             # SAmax: executa múltiplas iterações na mesma temperatura
             for _ in range(self.sa_max):
-                # Gera vizinho: usa 2-opt se habilitado, senão usa swap simples
-                if self.use_2opt and random.random() < 0.7:
-                    new_route = self._generate_neighbor_2opt(current_route)
-                else:
-                    new_route = self._generate_neighbor(current_route)
+                steps += 1
+                proposals += self.batch_size
                 
-                new_cost = self._calculate_route_cost(new_route)
-                
-                # Compara o custo novo com o anterior
-                delta = new_cost - current_cost
+                if self.batch_size > 1:
+                    new_route, delta, rule_accepted = self._generate_batch_neighbor(current_route, T)
+                    if new_route is None:
+                        iterations_without_improvement += 1
+                        continue
+                    new_cost = current_cost + delta
+                else:
+                    rule_accepted = False
+                    # Gera vizinho: usa 2-opt se habilitado, senão usa swap simples
+                    if self.use_2opt and self.rng.random() < 0.7:
+                        new_route = self._generate_neighbor_2opt(current_route)
+                    else:
+                        new_route = self._generate_neighbor(current_route)
+                    
+                    new_cost = self._calculate_route_cost(new_route)
+                    
+                    # Compara o custo novo com o anterior
+                    delta = new_cost - current_cost
                 
                 # Critério de aceitação
                 if delta < 0:
                     current_route = new_route
                     current_cost = new_cost
+                    accepted_moves += 1
                     
                     if current_cost < best_cost:
                         best_route = current_route.copy()
                         best_cost = current_cost
                         iterations_without_improvement = 0
+                        anytime_times.append(time.perf_counter() - start_time)
+                        anytime_costs.append(best_cost)
+                        if target_cost is not None and best_cost <= target_cost:
+                            reached_target_gap = True
+                        if self.elite_pool_size:
+                            elite_pool.add(best_route, best_cost)
                     else:
                         iterations_without_improvement += 1
                 else:
-                    # Se for pior, aceita às vezes
+                    # Se for pior, aceita às vezes (no heat-bath a regra já decidiu)
                     acceptance_prob = np.exp(-delta / T) if T > 0 else 0
-                    if random.random() < acceptance_prob:
+                    if rule_accepted or self.rng.random() < acceptance_prob:
                         current_route = new_route
                         current_cost = new_cost
+                        accepted_moves += 1
                     iterations_without_improvement += 1
             
             # Armazena histórico
-            self.history['iterations'].append(iteration)
-            self.history['temperatures'].append(T)
-            self.history['current_costs'].append(current_cost)
-            self.history['best_costs'].append(best_cost)
+            if record_history:
+                self.history['iterations'].append(iteration)
+                self.history['temperatures'].append(T)
+                self.history['current_costs'].append(current_cost)
+                self.history['best_costs'].append(best_cost)
+            
+            # Rotas atuais boas o suficiente também entram no pool (checagem barata pelo limiar)
+            if self.elite_pool_size and current_cost < elite_pool.threshold:
+                elite_pool.add(current_route, current_cost)
+            
+            if snapshot_interval and iteration % snapshot_interval == 0:
+                improved = snapshot_best_cost is None or best_cost < snapshot_best_cost
+                snapshot_best_cost = best_cost
+                yield {
+                    'iteration': iteration,
+                    'temperature': T,
+                    'current_cost': current_cost,
+                    'best_cost': best_cost,
+                    'best_route': best_route.copy() if improved else None,
+                    'done': False
+                }
             
             if verbose and iteration % 10000 == 0:
                 print(f"{iteration:<12} | {T:<12.4f} | {current_cost:<12.2f} | {best_cost:<12.2f}")
             
             iteration += 1
         
+        # O pedido de request_stop() vale para uma execução só
+        if stop_event is self._stop_event:
+            self._stop_event.clear()
+        
         if verbose:
             print(f"{'-'*60}")
             print(f"Custo final: {best_cost:.2f}")
             print(f"Melhoria: {((1 - best_cost/self._calculate_route_cost(initial_route)) * 100):.2f}%")
             print(f"Número de reaquecimentos: {len(self.history['reheat_points'])}")
+            if self.restart_strategy != 'current':
+                print(f"Reinícios a partir do pool de elite: {len(self.history['restart_points'])}")
+            if self.lower_bound is not None:
+                print(f"Gap para o limite inferior ({self.lower_bound:.2f}): "
+                      f"{(best_cost - self.lower_bound) / self.lower_bound * 100:.2f}%")
+            if reached_target_gap:
+                print(f"Parada antecipada: gap alvo de {self.target_gap:.2f}% atingido na iteração {iteration}")
             print(f"{'='*60}\n")
         
-        return {
+        result = {
             'initial_route': initial_route,
             'best_route': best_route,
             'initial_cost': self._calculate_route_cost(initial_route),
             'best_cost': best_cost,
             'history': self.history,
             'cities': self.cities,
-            'seed': self.seed
+            'seed': self.seed,
+            'stopped_early': stopped_early,
+            'elite_pool': elite_pool.to_list(),
+            'lower_bound': self.lower_bound,
+            'gap_to_bound': ((best_cost - self.lower_bound) / self.lower_bound * 100
+                             if self.lower_bound else None),
+            'reached_target_gap': reached_target_gap,
+            'acceptance_stats': {
+                'batch_size': self.batch_size,
+                'batch_rule': self.batch_rule,
+                'steps': steps,
+                'proposals': proposals,
+                'accepted': accepted_moves,
+                'acceptance_rate': accepted_moves / steps if steps else 0.0
+            },
+            # Ponto final marca o tempo total da execução
+            'anytime_trace': {
+                'times': anytime_times + [time.perf_counter() - start_time],
+                'best_costs': anytime_costs + [best_cost]
+            }
+        }
+        
+        yield {
+            'iteration': iteration,
+            'temperature': T,
+            'current_cost': current_cost,
+            'best_cost': best_cost,
+            'best_route': best_route.copy(),
+            'done': True,
+            'result': result
         }
\ No newline at end of file
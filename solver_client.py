@@ -0,0 +1,69 @@
+import json
+import socket
+
+
+DEFAULT_ADDRESS = ('127.0.0.1', 8765)
+
+
+class SolverClient:
+    """
+    Cliente leve do solver_daemon (não importa NumPy). Cada chamada abre uma conexão,
+    envia uma requisição JSON e lê as respostas linha a linha.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None):
+        self.address = address
+        self.timeout = timeout
+
+    def _connect(self):
+        family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.address)
+        return sock
+
+    def _request(self, request):
+        """Envia a requisição e gera cada mensagem de resposta"""
+        with self._connect() as sock:
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as stream:
+                for line in stream:
+                    message = json.loads(line)
+                    if message['type'] == 'error':
+                        raise RuntimeError(message['message'])
+                    yield message
+                    if message['type'] in ('ok', 'result'):
+                        return
+
+    def _single(self, request):
+        for message in self._request(request):
+            return message
+
+    def load(self, path, name=None, distance_dtype='float64', packed_distances=False):
+        """Carrega uma instância no daemon; retorna o nome usado para referenciá-la"""
+        return self._single({'command': 'load', 'path': path, 'name': name,
+                             'distance_dtype': distance_dtype,
+                             'packed_distances': packed_distances})['name']
+
+    def unload(self, name):
+        return self._single({'command': 'unload', 'name': name})['unloaded']
+
+    def list_instances(self):
+        return self._single({'command': 'list'})['instances']
+
+    def solve_stream(self, instance, params, seed=42, snapshot_interval=1000, record_history=False):
+        """Gera os snapshots da execução; o último tem done=True e o resultado em 'result'"""
+        for message in self._request({'command': 'solve', 'instance': instance, 'params': params,
+                                      'seed': seed, 'snapshot_interval': snapshot_interval,
+                                      'record_history': record_history}):
+            if message['type'] == 'result':
+                yield {'done': True, 'result': message['result']}
+            else:
+                yield message
+
+    def solve(self, instance, params, seed=42, record_history=False):
+        """Executa o SA no daemon e retorna o resultado (mesmo formato de solve())"""
+        for snapshot in self.solve_stream(instance, params, seed, snapshot_interval=None,
+                                          record_history=record_history):
+            if snapshot['done']:
+                return snapshot['result']
@@ -0,0 +1,319 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import select
+import socket
+import socketserver
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from shared_instance import SharedInstance, attached_instance, release_attached
+
+
+DEFAULT_ADDRESS = ('127.0.0.1', 8765)
+
+# Sem snapshots pedidos pelo cliente, o worker ainda confere o cancelamento a cada N iterações
+CANCEL_CHECK_INTERVAL = 1000
+
+# Intervalo (s) em que o handler confere se o cliente desconectou enquanto espera snapshots
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+def _solve_in_worker(handle, live_matrices, params, seed, snapshot_interval, record_history,
+                     snapshots, cancel):
+    """
+    Executa um solve dentro de um processo do pool. A instância é conectada via memória
+    compartilhada (uma vez por worker); snapshots vão para a fila do manager e o resultado
+    volta pelo future.
+    """
+    # Solta instâncias que o daemon já descarregou
+    release_attached(keep=live_matrices)
+    sa = attached_instance(handle).create_solver(params, seed)
+
+    stop_event = threading.Event()
+    for snapshot in sa.solve_iter(snapshot_interval=snapshot_interval or CANCEL_CHECK_INTERVAL,
+                                  record_history=record_history, stop_event=stop_event):
+        if snapshot['done']:
+            return snapshot['result']
+        if snapshot_interval:
+            snapshots.put(snapshot)
+        if cancel.is_set():
+            stop_event.set()
+
+
+class WorkerPool:
+    """
+    ProcessPoolExecutor que é recriado quando um worker morre (OOM, sinal, segfault).
+    Um worker morto quebra o executor inteiro; sem recriá-lo, todo solve seguinte falharia.
+    """
+
+    def __init__(self, max_workers, context):
+        self.max_workers = max_workers
+        self.context = context
+        self._lock = threading.Lock()
+        self._executor = self._create()
+
+    def _create(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.context)
+
+    def submit(self, fn, *args):
+        """Submete ao executor atual; retorna (executor, future) para um eventual restart()"""
+        with self._lock:
+            executor = self._executor
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # Outro handler ainda não notou a quebra: recria e tenta uma vez no pool novo
+            self.restart(executor)
+            with self._lock:
+                executor = self._executor
+            return executor, executor.submit(fn, *args)
+
+    def restart(self, broken):
+        """Troca o executor quebrado por um novo (só o primeiro handler que notar a quebra recria)"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._create()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor = self._executor
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class InstanceRegistry:
+    """
+    Instâncias carregadas pelo daemon. Cada uma é publicada uma vez em memória compartilhada
+    (SharedInstance) e os processos do pool se conectam a ela sem copiar a matriz.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, path, distance_dtype='float64', packed_distances=False):
+        shared = SharedInstance.create(path, distance_dtype, packed_distances)
+        instance = {
+            'name': name,
+            'path': path,
+            'n_cities': shared.handle['n_cities'],
+            'distance_dtype': distance_dtype,
+            'packed_distances': packed_distances,
+            'matrix_bytes': int(shared.distance_matrix.nbytes),
+            'shared': shared
+        }
+        with self._lock:
+            previous = self._instances.pop(name, None)
+            self._instances[name] = instance
+        if previous is not None:
+            self._release(previous)
+        return instance
+
+    def unload(self, name):
+        with self._lock:
+            instance = self._instances.pop(name, None)
+        if instance is None:
+            return False
+        self._release(instance)
+        return True
+
+    def clear(self):
+        with self._lock:
+            instances = list(self._instances.values())
+            self._instances.clear()
+        for instance in instances:
+            self._release(instance)
+
+    @staticmethod
+    def _release(instance):
+        # Workers que já estão conectados mantêm o mapeamento até terminarem o solve atual
+        instance['shared'].close()
+        instance['shared'].unlink()
+
+    def get(self, name):
+        with self._lock:
+            return self._instances.get(name)
+
+    def live_matrices(self):
+        """Nomes dos blocos de matriz ainda publicados (os workers soltam os demais)"""
+        with self._lock:
+            return frozenset(instance['shared'].handle['matrix_name'] for instance in self._instances.values())
+
+    def describe(self):
+        with self._lock:
+            return [{
+                'name': instance['name'],
+                'path': instance['path'],
+                'n_cities': instance['n_cities'],
+                'distance_dtype': instance['distance_dtype'],
+                'packed_distances': instance['packed_distances'],
+                'matrix_bytes': instance['matrix_bytes']
+            } for instance in self._instances.values()]
+
+
+class SolverRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Protocolo: uma requisição JSON por linha; cada resposta também é uma linha JSON.
+    Comandos: load, unload, list, solve (solve envia snapshots e termina com 'result').
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                command = request.get('command')
+                if command == 'load':
+                    self._handle_load(request)
+                elif command == 'unload':
+                    self._send({'type': 'ok', 'unloaded': self.server.registry.unload(request['name'])})
+                elif command == 'list':
+                    self._send({'type': 'ok', 'instances': self.server.registry.describe()})
+                elif command == 'solve':
+                    self._handle_solve(request)
+                else:
+                    raise ValueError(f"Comando '{command}' não reconhecido")
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as exc:
+                self._send({'type': 'error', 'message': str(exc)})
+
+    def _send(self, message):
+        self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def _client_disconnected(self):
+        """Confere sem bloquear se o cliente fechou a conexão (leitura pronta e vazia = EOF)"""
+        readable, _, _ = select.select([self.connection], [], [], 0)
+        if not readable:
+            return False
+        try:
+            return self.connection.recv(1, socket.MSG_PEEK) == b''
+        except OSError:
+            return True
+
+    def _handle_load(self, request):
+        path = request['path']
+        name = request.get('name') or os.path.basename(path)
+        instance = self.server.registry.load(name, path,
+                                             request.get('distance_dtype', 'float64'),
+                                             request.get('packed_distances', False))
+        self._send({'type': 'ok', 'name': name, 'n_cities': instance['n_cities']})
+
+    def _handle_solve(self, request):
+        instance = self.server.registry.get(request['instance'])
+        if instance is None:
+            raise ValueError(f"Instância '{request['instance']}' não está carregada")
+
+        # Fila de snapshots e token de cancelamento criados antes de submeter ao pool
+        manager = self.server.manager
+        snapshots = manager.Queue()
+        cancel = manager.Event()
+        executor, future = self.server.pool.submit(
+            _solve_in_worker, instance['shared'].handle, self.server.registry.live_matrices(),
+            request['params'], request.get('seed', 42), request.get('snapshot_interval'),
+            request.get('record_history', False), snapshots, cancel)
+        # Os snapshots do worker chegam antes deste marcador de fim
+        future.add_done_callback(lambda _: snapshots.put(None))
+
+        try:
+            while True:
+                try:
+                    snapshot = snapshots.get(timeout=DISCONNECT_POLL_INTERVAL)
+                except queue.Empty:
+                    # Sem snapshots o handler não escreve no socket; confere o cliente aqui
+                    if self._client_disconnected():
+                        raise ConnectionResetError("Cliente desconectou durante o solve")
+                    continue
+                if snapshot is None:
+                    break
+                self._send(dict(snapshot, type='snapshot'))
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # O worker deste solve morreu: recria o pool para as próximas requisições
+                self.server.pool.restart(executor)
+                raise RuntimeError("O worker do solve terminou inesperadamente; o pool foi recriado")
+            self._send({'type': 'result', 'result': result})
+        except (BrokenPipeError, ConnectionResetError):
+            # Cliente desconectou: não adianta continuar a execução
+            cancel.set()
+            raise
+
+
+class SolverTCPServer(socketserver.ThreadingTCPServer):
+    """Servidor TCP do daemon; reutiliza a porta ao reiniciar sem alterar a classe da biblioteca"""
+    allow_reuse_address = True
+
+
+class SolverDaemon:
+    """
+    Serviço residente de SA: mantém instâncias carregadas e atende requisições de solve
+    em um pool de processos (um solve por núcleo, sem disputar o GIL), enviando o progresso
+    ao cliente conforme a execução avança. address pode ser (host, porta) ou o caminho de
+    um Unix socket.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, max_workers=None):
+        self.address = address
+        self.registry = InstanceRegistry()
+        # spawn: o daemon já tem threads rodando quando o pool cria processos
+        context = multiprocessing.get_context('spawn')
+        self.manager = context.Manager()
+        self.pool = WorkerPool(max_workers or os.cpu_count(), context)
+
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            server_class = socketserver.ThreadingUnixStreamServer
+        else:
+            server_class = SolverTCPServer
+
+        self.server = server_class(address, SolverRequestHandler)
+        self.server.daemon_threads = True
+        self.server.registry = self.registry
+        self.server.pool = self.pool
+        self.server.manager = self.manager
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        """Para o loop de serve_forever() (chamar de outra thread)"""
+        self.server.shutdown()
+
+    def close(self):
+        self.server.server_close()
+        self.pool.shutdown()
+        self.manager.shutdown()
+        self.registry.clear()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daemon de Simulated Annealing com cache de instâncias")
+    parser.add_argument('--host', default=DEFAULT_ADDRESS[0])
+    parser.add_argument('--port', type=int, default=DEFAULT_ADDRESS[1])
+    parser.add_argument('--unix-socket', help="Escuta em um Unix socket em vez de TCP")
+    parser.add_argument('--workers', type=int, default=None, help="Tamanho do pool de workers")
+    parser.add_argument('--preload', nargs='*', default=[], help="Instâncias carregadas na inicialização")
+    args = parser.parse_args()
+
+    address = args.unix_socket or (args.host, args.port)
+    daemon = SolverDaemon(address, max_workers=args.workers)
+    for path in args.preload:
+        instance = daemon.registry.load(os.path.basename(path), path)
+        print(f"Instância carregada: {instance['name']} ({instance['n_cities']} cidades)")
+    print(f"Daemon escutando em {address}")
+    daemon.serve_forever()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from async_solver import stream_solve
+from simulated_annealing import SimulatedAnnealing
+
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'Instancias', '51_cidades.txt')
+PARAMS = {'T_0': 1000, 'T_min': 0.001, 'max_iterations': 100000, 'cooling_schedule': 'schedule_8'}
+
+
+def test_cancel_while_queued_in_executor_stops_run_immediately():
+    sa = SimulatedAnnealing(INSTANCE, PARAMS, seed=1)
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    snapshots = []
+
+    async def consume():
+        async for snapshot in stream_solve(sa, snapshot_interval=1, executor=executor):
+            snapshots.append(snapshot)
+
+    async def main():
+        # Ocupa a única thread do executor: a execução do SA fica na fila
+        executor.submit(release.wait)
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        start = time.perf_counter()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return time.perf_counter() - start
+
+    try:
+        elapsed = asyncio.run(main())
+    finally:
+        executor.shutdown(wait=True)
+
+    assert snapshots == []
+    assert elapsed < 0.5
+
+
+def test_stream_completes_with_result():
+    sa = SimulatedAnnealing(INSTANCE, dict(PARAMS, max_iterations=2000), seed=1)
+
+    async def main():
+        return [snapshot async for snapshot in stream_solve(sa, snapshot_interval=500)]
+
+    snapshots = asyncio.run(main())
+    assert snapshots[-1]['done']
+    assert not snapshots[-1]['result']['stopped_early']
+    assert [snapshot['iteration'] for snapshot in snapshots[:-1]] == [0, 500, 1000, 1500]
+
+
+def test_request_stop_before_solve_is_not_lost():
+    sa = SimulatedAnnealing(INSTANCE, PARAMS, seed=1)
+    sa.request_stop()
+    result = sa.solve(verbose=False)
+    assert result['stopped_early']
+    assert result['history']['iterations'] == []
+
+    # O pedido é consumido: a execução seguinte roda normalmente
+    sa = SimulatedAnnealing(INSTANCE, dict(PARAMS, max_iterations=100), seed=1)
+    sa.request_stop()
+    sa.solve(verbose=False)
+    assert not sa.solve(verbose=False)['stopped_early']
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+from simulated_annealing import SimulatedAnnealing
+
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'Instancias', '51_cidades.txt')
+STORAGES = {
+    'dense': {},
+    'packed': {'packed_distances': True},
+    'nint': {'distance_dtype': 'nint'},
+    'nint_packed': {'distance_dtype': 'nint', 'packed_distances': True},
+}
+
+
+def make_solver(storage):
+    params = dict({'T_0': 1000, 'T_min': 0.001, 'max_iterations': 1000,
+                   'cooling_schedule': 'schedule_8', 'batch_size': 8}, **STORAGES[storage])
+    return SimulatedAnnealing(INSTANCE, params, seed=1)
+
+
+def all_moves(n):
+    """Todos os pares 1 <= lo < hi <= n-1 (inclui vizinhos e lo=1, hi=n-1)"""
+    lo, hi = np.triu_indices(n, k=1)
+    keep = lo >= 1
+    return lo[keep], hi[keep]
+
+
+@pytest.mark.parametrize('storage', sorted(STORAGES))
+def test_batch_deltas_match_full_route_cost(storage):
+    sa = make_solver(storage)
+    n = sa.n_cities
+    route = [0] + (1 + np.random.default_rng(7).permutation(n - 1)).tolist()
+    cost = sa._calculate_route_cost(route)
+    lo, hi = all_moves(n)
+    assert np.any(hi == lo + 1) and np.any((lo == 1) & (hi == n - 1))
+
+    for is_2opt in (True, False):
+        deltas = sa._batch_deltas(np.asarray(route), lo, hi, np.full(len(lo), is_2opt))
+        for a, b, delta in zip(lo, hi, deltas):
+            moved = route.copy()
+            if is_2opt:
+                moved[a:b+1] = reversed(moved[a:b+1])
+            else:
+                moved[a], moved[b] = moved[b], moved[a]
+            assert delta == pytest.approx(sa._calculate_route_cost(moved) - cost, abs=1e-9)
+
+
+@pytest.mark.parametrize('rule', ['metropolis', 'heat_bath'])
+def test_batch_neighbor_returns_consistent_delta(rule):
+    sa = make_solver('dense')
+    sa.batch_rule = rule
+    route = list(range(sa.n_cities))
+    cost = sa._calculate_route_cost(route)
+    for _ in range(200):
+        new_route, delta, _ = sa._generate_batch_neighbor(route, 50.0)
+        if new_route is None:
+            continue
+        assert sorted(new_route) == route
+        assert delta == pytest.approx(sa._calculate_route_cost(new_route) - cost, abs=1e-9)
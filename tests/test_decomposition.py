@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from decomposition import DecompositionSolver
+from simulated_annealing import SimulatedAnnealing
+
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'Instancias', '100_cidades.txt')
+PARAMS = {'T_0': 1000, 'T_min': 0.001, 'max_iterations': 5000, 'cooling_schedule': 'schedule_8',
+          'distance_dtype': 'nint'}
+
+
+def solve(params):
+    return DecompositionSolver(INSTANCE, params, region_size=30, n_workers=1).solve(verbose=False)
+
+
+def test_result_has_same_keys_as_simulated_annealing():
+    result = solve(PARAMS)
+    sa_result = SimulatedAnnealing(INSTANCE, dict(PARAMS, max_iterations=10), seed=1).solve(verbose=False)
+    assert set(sa_result) <= set(result)
+    assert result['lower_bound'] is None and result['gap_to_bound'] is None
+    assert result['reached_target_gap'] is False
+
+
+def test_target_gap_requires_lower_bound():
+    with pytest.raises(ValueError):
+        DecompositionSolver(INSTANCE, dict(PARAMS, target_gap=5.0))
+
+
+def test_target_gap_reached_after_stitching_skips_refinement():
+    result = solve(dict(PARAMS, lower_bound=20000.0, target_gap=1000.0))
+    assert result['stopped_early'] and result['reached_target_gap']
+    assert result['best_route'] == result['initial_route']
+    assert result['gap_to_bound'] == pytest.approx((result['best_cost'] - 20000.0) / 200.0)
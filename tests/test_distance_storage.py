@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import distance_storage
+from distance_storage import PackedDistanceMatrix, build_distance_matrix, matrix_layout, nint
+
+
+def reference_matrix(cities, distance_dtype):
+    coords = np.asarray(cities, dtype=np.float64)
+    matrix = np.sqrt(((coords[:, np.newaxis, :] - coords[np.newaxis, :, :]) ** 2).sum(axis=2))
+    return nint(matrix) if distance_dtype == 'nint' else matrix
+
+
+@pytest.mark.parametrize('distance_dtype', ['float64', 'float32', 'nint'])
+@pytest.mark.parametrize('packed', [False, True])
+def test_blockwise_build_matches_dense_reference(monkeypatch, distance_dtype, packed):
+    # Blocos pequenos para exercitar várias linhas por bloco e o último bloco parcial
+    monkeypatch.setattr(distance_storage, 'BLOCK_ELEMENTS', 64)
+    cities = [tuple(point) for point in np.random.default_rng(3).random((37, 2)) * 500]
+    matrix = build_distance_matrix(cities, distance_dtype, packed)
+
+    dtype, shape = matrix_layout(cities, distance_dtype, packed)
+    data = matrix.data if packed else matrix
+    assert data.dtype == dtype and data.shape == shape
+    dense = matrix.toarray() if packed else matrix
+    np.testing.assert_allclose(dense, reference_matrix(cities, distance_dtype).astype(dtype), rtol=1e-6)
+
+
+def test_nint_uses_int32_when_distances_do_not_fit_int16():
+    matrix = build_distance_matrix([(0.0, 0.0), (40000.0, 0.0), (0.0, 1.0)], 'nint')
+    assert matrix.dtype == np.int32
+    assert matrix[0, 1] == 40000
+
+
+def test_build_into_preallocated_buffer():
+    cities = [(0.0, 0.0), (3.0, 4.0), (6.0, 8.0)]
+    dtype, shape = matrix_layout(cities, 'nint', packed=True)
+    out = np.zeros(shape, dtype=dtype)
+    matrix = build_distance_matrix(cities, 'nint', packed=True, out=out)
+    assert isinstance(matrix, PackedDistanceMatrix) and matrix.data is out
+    assert out.tolist() == [5, 10, 5]
+    with pytest.raises(ValueError):
+        build_distance_matrix(cities, 'float64', packed=True, out=out)
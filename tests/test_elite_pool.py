@@ -0,0 +1,61 @@
+import os
+import random
+
+from elite_pool import ElitePool, double_bridge
+from simulated_annealing import SimulatedAnnealing
+
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'Instancias', '51_cidades.txt')
+
+
+def test_tour_key_ignores_rotation_and_direction():
+    route = [0, 3, 1, 4, 2, 5]
+    key = ElitePool.tour_key(route)
+    for start in range(len(route)):
+        rotated = route[start:] + route[:start]
+        assert ElitePool.tour_key(rotated) == key
+        assert ElitePool.tour_key(rotated[::-1]) == key
+    assert ElitePool.tour_key([0, 1, 3, 4, 2, 5]) != key
+
+
+def test_add_rejects_equivalent_tours():
+    pool = ElitePool(3)
+    assert pool.add([0, 1, 2, 3, 4], 10.0)
+    assert not pool.add([2, 3, 4, 0, 1], 10.0)
+    assert not pool.add([0, 4, 3, 2, 1], 10.0)
+    assert len(pool) == 1
+
+
+def test_add_keeps_best_tours_sorted_and_evicts_worst():
+    pool = ElitePool(2)
+    assert pool.add([0, 1, 2, 3, 4], 30.0)
+    assert pool.add([0, 2, 1, 3, 4], 10.0)
+    assert pool.threshold == 30.0
+    assert not pool.add([0, 1, 3, 2, 4], 30.0)
+    assert pool.add([0, 1, 2, 4, 3], 20.0)
+
+    assert [entry['cost'] for entry in pool.to_list()] == [10.0, 20.0]
+    # A rota removida sai também do conjunto de hashes e pode voltar a entrar
+    assert pool.add([0, 1, 2, 3, 4], 15.0)
+    assert [entry['cost'] for entry in pool.to_list()] == [10.0, 15.0]
+
+
+def test_double_bridge_keeps_first_city_and_permutation():
+    rng = random.Random(0)
+    route = list(range(20))
+    kicked = double_bridge(route, rng)
+    assert kicked[0] == 0
+    assert sorted(kicked) == route
+    assert kicked != route
+
+
+def test_elite_restarts_are_recorded():
+    params = {'T_0': 1000, 'T_min': 0.001, 'max_iterations': 20000, 'cooling_schedule': 'schedule_8',
+              'stagnation_limit': 2000, 'restart_strategy': 'elite_kick'}
+    result = SimulatedAnnealing(INSTANCE, params, seed=1).solve(verbose=False)
+    restart_points = result['history']['restart_points']
+    assert restart_points
+    assert restart_points == sorted(restart_points)
+    # Sem elite_restart_temp o recomeço não reaquece
+    assert result['history']['reheat_points'] == []
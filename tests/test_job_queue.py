@@ -0,0 +1,114 @@
+import sqlite3
+import time
+
+import pytest
+
+from job_queue import JobQueue
+
+
+def make_queue(tmp_path, **kwargs):
+    queue = JobQueue(str(tmp_path / 'jobs.db'), **kwargs)
+    queue.enqueue_sweep('eil51.tsp', ['schedule_8'], [1], {'max_iterations': 10})
+    return queue
+
+
+def test_expired_lease_is_requeued_and_stale_worker_cannot_complete(tmp_path):
+    queue = make_queue(tmp_path, lease_timeout=0.05)
+    job = queue.claim_job('worker-a')
+    time.sleep(0.1)
+
+    assert queue.requeue_expired() == 1
+    assert queue.status_counts() == {'pending': 1}
+
+    reclaimed = queue.claim_job('worker-b')
+    assert reclaimed['id'] == job['id']
+    assert reclaimed['attempts'] == 2
+
+    # O worker antigo não pode sobrescrever nem renovar o job que perdeu
+    assert not queue.renew_lease(job['id'], 'worker-a')
+    assert not queue.complete_job(job['id'], 'worker-a', {'best_cost': 1.0})
+    assert not queue.fail_job(job['id'], 'worker-a', 'erro')
+    assert queue.complete_job(job['id'], 'worker-b', {'best_cost': 2.0})
+
+    _, costs = queue.load_results()
+    assert costs == {'schedule_8': [2.0]}
+
+
+def test_renew_lease_keeps_job_from_being_reclaimed(tmp_path):
+    queue = make_queue(tmp_path, lease_timeout=0.2)
+    job = queue.claim_job('worker-a')
+    time.sleep(0.15)
+    assert queue.renew_lease(job['id'], 'worker-a')
+    time.sleep(0.1)
+
+    assert queue.claim_job('worker-b') is None
+    assert queue.requeue_expired() == 0
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    for attempt in range(2):
+        job = queue.claim_job('worker-a')
+        assert job['attempts'] == attempt + 1
+        assert queue.fail_job(job['id'], 'worker-a', 'erro')
+
+    assert queue.status_counts() == {'failed': 1}
+    assert queue.claim_job('worker-a') is None
+    assert not queue.has_open_jobs()
+
+
+def test_expired_lease_after_max_attempts_is_marked_failed(tmp_path):
+    queue = make_queue(tmp_path, lease_timeout=0.05, max_attempts=1)
+    queue.claim_job('worker-a')
+    time.sleep(0.1)
+
+    assert queue.claim_job('worker-b') is None
+    assert queue.requeue_expired() == 1
+    assert queue.status_counts() == {'failed': 1}
+
+
+def test_claim_lock_timeout_raises_original_error(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    monkeypatch.setattr(queue, '_connect', lambda: sqlite3.connect(queue.db_path, timeout=0.05,
+                                                                  isolation_level=None))
+    holder = sqlite3.connect(queue.db_path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            queue.claim_job('worker-a')
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+
+
+def complete_all(queue, cost_of):
+    while True:
+        job = queue.claim_job('worker-a')
+        if job is None:
+            return
+        result = {'best_cost': cost_of(job), 'anytime_trace': {'times': [0.0], 'best_costs': [0.0]}}
+        queue.complete_job(job['id'], 'worker-a', result)
+
+
+def test_results_are_filtered_by_sweep(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.db'))
+    schedules = ['schedule_0', 'schedule_8']
+    old_key, old_new = queue.enqueue_sweep('eil51.tsp', schedules, [1, 2, 3], {'T_0': 1000})
+    complete_all(queue, lambda job: 1000.0 + job['seed'])
+    new_key, new_new = queue.enqueue_sweep('eil51.tsp', schedules, [1, 2, 3], {'T_0': 500})
+    complete_all(queue, lambda job: 500.0 + job['seed'])
+
+    assert old_key != new_key
+    assert old_new == new_new == 6
+
+    results, costs = queue.load_results('eil51.tsp', new_key)
+    assert costs == {'schedule_0': [501.0, 502.0, 503.0], 'schedule_8': [501.0, 502.0, 503.0]}
+    assert {schedule: result['best_cost'] for schedule, result in results.items()} == \
+        {'schedule_0': 501.0, 'schedule_8': 501.0}
+    assert {schedule: len(traces) for schedule, traces in queue.load_anytime_traces('eil51.tsp', new_key).items()} == \
+        {'schedule_0': 3, 'schedule_8': 3}
+
+    # Reenfileirar o mesmo sweep devolve a mesma chave sem criar jobs
+    assert queue.enqueue_sweep('eil51.tsp', schedules, [1, 2, 3], {'T_0': 1000}) == (old_key, 0)
+    _, costs = queue.load_results('eil51.tsp', old_key)
+    assert costs['schedule_8'] == [1001.0, 1002.0, 1003.0]
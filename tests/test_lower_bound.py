@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+import lower_bound
+from lower_bound import instance_lower_bound
+from simulated_annealing import SimulatedAnnealing
+
+
+INSTANCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Instancias')
+EIL51 = os.path.join(INSTANCES, '51_cidades.txt')
+KROA100 = os.path.join(INSTANCES, '100_cidades.txt')
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache(monkeypatch):
+    monkeypatch.setattr(lower_bound, '_bound_cache', {})
+
+
+@pytest.mark.parametrize('instance_file, expected, optimum', [
+    (EIL51, 423.0, 426),
+    (KROA100, 20937.0, 21282),
+])
+def test_held_karp_bound_is_below_known_optimum(instance_file, expected, optimum):
+    bound = instance_lower_bound(instance_file, 'nint', cache_dir=None)
+    assert bound == expected
+    assert bound <= optimum
+
+
+def test_bound_is_written_atomically_and_reused(tmp_path):
+    bound = instance_lower_bound(EIL51, 'nint', cache_dir=str(tmp_path))
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].startswith('bound_') and files[0].endswith('.json')
+    with open(tmp_path / files[0]) as f:
+        assert json.load(f)['lower_bound'] == bound
+
+    lower_bound._bound_cache.clear()
+    with open(tmp_path / files[0], 'w') as f:
+        json.dump({'lower_bound': -1.0}, f)
+    assert instance_lower_bound(EIL51, 'nint', cache_dir=str(tmp_path)) == -1.0
+
+
+def test_truncated_bound_file_is_recomputed(tmp_path):
+    bound = instance_lower_bound(EIL51, 'nint', cache_dir=str(tmp_path))
+    path = tmp_path / os.listdir(tmp_path)[0]
+    path.write_text('{"lower_bou')
+
+    lower_bound._bound_cache.clear()
+    assert instance_lower_bound(EIL51, 'nint', cache_dir=str(tmp_path)) == bound
+    with open(path) as f:
+        assert json.load(f)['lower_bound'] == bound
+
+
+def test_target_gap_stops_run_early():
+    params = {'T_0': 1000, 'T_min': 0.001, 'max_iterations': 200000, 'cooling_schedule': 'schedule_8',
+              'distance_dtype': 'nint', 'lower_bound': 423.0, 'target_gap': 10.0}
+    result = SimulatedAnnealing(EIL51, params, seed=1).solve(verbose=False)
+    assert result['reached_target_gap'] and result['stopped_early']
+    assert result['gap_to_bound'] <= 10.0
+    assert result['history']['iterations'][-1] < params['max_iterations'] - 1
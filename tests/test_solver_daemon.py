@@ -0,0 +1,75 @@
+import json
+import os
+import signal
+import socket
+import threading
+import time
+
+import pytest
+
+from solver_client import SolverClient
+from solver_daemon import SolverDaemon
+
+
+INSTANCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'Instancias', '51_cidades.txt')
+QUICK_PARAMS = {'T_0': 1000, 'T_min': 0.001, 'max_iterations': 2000, 'cooling_schedule': 'schedule_8'}
+LONG_PARAMS = dict(QUICK_PARAMS, max_iterations=10**9)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = SolverDaemon(str(tmp_path / 'daemon.sock'), max_workers=1)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    client = SolverClient(daemon.address, timeout=60)
+    client.load(INSTANCE, name='eil51')
+    yield daemon, client
+    daemon.shutdown()
+    thread.join()
+
+
+def _worker_pids(daemon):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        pids = list(daemon.pool._executor._processes)
+        if pids:
+            return pids
+        time.sleep(0.05)
+    raise AssertionError("Pool não iniciou nenhum worker")
+
+
+def test_killed_worker_fails_only_its_request_and_pool_recovers(daemon):
+    daemon, client = daemon
+    errors = []
+
+    def long_solve():
+        try:
+            client.solve('eil51', LONG_PARAMS)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    thread = threading.Thread(target=long_solve)
+    thread.start()
+    for pid in _worker_pids(daemon):
+        os.kill(pid, signal.SIGKILL)
+    thread.join(timeout=30)
+
+    assert errors and 'pool foi recriado' in errors[0]
+    result = client.solve('eil51', QUICK_PARAMS)
+    assert result['best_cost'] > 0
+
+
+def test_client_disconnect_without_snapshots_cancels_run(daemon):
+    daemon, client = daemon
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(daemon.address)
+        sock.sendall(json.dumps({'command': 'solve', 'instance': 'eil51', 'params': LONG_PARAMS,
+                                 'snapshot_interval': None}).encode('utf-8') + b'\n')
+        _worker_pids(daemon)
+
+    # Com um único worker, o próximo solve só roda se a execução abandonada foi cancelada
+    start = time.perf_counter()
+    result = client.solve('eil51', QUICK_PARAMS)
+    assert result['best_cost'] > 0
+    assert time.perf_counter() - start < 30